@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the Home Assistant command line entry points
+Times cache-hit commands against a bare interpreter and fails if they exceed the budget
+"""
+
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RUNS = int(os.getenv('BENCH_STARTUP_RUNS', '15'))
+# Allowed startup cost on top of a bare interpreter, per command
+BUDGET_MS = float(os.getenv('BENCH_STARTUP_BUDGET_MS', '60'))
+OUTPUT_FILE = os.path.join(HERE, 'bench_output.txt')
+
+def run_command(args, env):
+    """Run a command once, returning (elapsed ms, stdout)"""
+    start = time.perf_counter()
+    result = subprocess.run(args, env=env, capture_output=True, text=True, cwd=HERE)
+    elapsed = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} failed: {result.stderr.strip()}")
+    return elapsed, result.stdout.strip()
+
+def median_ms(args, env):
+    return statistics.median(run_command(args, env)[0] for _ in range(RUNS))
+
+def imported_modules(args, env):
+    """Top-level module names imported while running a command"""
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + args[1:], env=env,
+                            capture_output=True, text=True, cwd=HERE)
+    modules = set()
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            modules.add(line.rsplit('|', 1)[1].strip().split('.')[0])
+    return modules
+
+def seed_fuel_cache(directory):
+    """Write a fresh answer cache so ha_fuel_prices.py can answer without fetching"""
+    cache_file = os.path.join(directory, 'fuel_prices_cache.json')
+    summary = {'ASDA': {'station_id': '1', 'station_name': 'Bench', 'postcode': 'BT8 8FD',
+                        'diesel_price_per_litre': 1.459, 'diesel_price_per_kwh': 0.1459}}
+    with open(cache_file, 'w') as f:
+        json.dump({'version': 2, 'timestamp': time.time(), 'postcodes': {'BT8': summary}}, f)
+    return cache_file
+
+def start_eph_stub(socket_path):
+    """Answer eph_helper.py client requests like a running server would"""
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen(8)
+    
+    def loop():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            with conn, conn.makefile('rb') as request:
+                if request.readline():
+                    conn.sendall(json.dumps({'ok': True, 'output': '20.5'}).encode('utf-8') + b'\n')
+    
+    threading.Thread(target=loop, daemon=True).start()
+    return server
+
+def main():
+    """Benchmark each entry point and enforce the startup budget"""
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ)
+        env['FUEL_CACHE_FILE'] = seed_fuel_cache(directory)
+        env['FUEL_DATASET_FILE'] = os.path.join(directory, 'fuel_prices_stations.json')
+        env['EPH_HELPER_SOCKET'] = os.path.join(directory, 'eph_helper.sock')
+        stub = start_eph_stub(env['EPH_HELPER_SOCKET'])
+        
+        # Modules that must not load on these paths
+        cases = [
+            ('ha_fuel_prices get_diesel (cache hit)',
+             [sys.executable, 'ha_fuel_prices.py', 'get_diesel', 'ASDA', 'BT8'], {'fuel_price_analyzer', 'ssl', 'http'}),
+            ('eph_helper temperature (server running)',
+             [sys.executable, 'eph_helper.py', 'temperature', 'Zone'], {'pyephember2', 'paho', 'requests'}),
+        ]
+        
+        baseline = median_ms([sys.executable, '-c', 'pass'], env)
+        lines = [f"Interpreter startup: {baseline:.1f} ms (median of {RUNS})"]
+        failed = False
+        for name, args, forbidden in cases:
+            _, output = run_command(args, env)  # Warm up and capture the answer
+            elapsed = median_ms(args, env)
+            overhead = elapsed - baseline
+            loaded = sorted(imported_modules(args, env) & forbidden)
+            ok = overhead <= BUDGET_MS and not loaded
+            failed = failed or not ok
+            lines.append(f"{'✓' if ok else '✗'} {name}: {elapsed:.1f} ms "
+                         f"(+{overhead:.1f} ms, budget {BUDGET_MS:.0f} ms) -> {output}")
+            if loaded:
+                lines.append(f"    imported on the fast path: {', '.join(loaded)}")
+        stub.close()
+    
+    report = "\n".join(lines)
+    print(report)
+    with open(OUTPUT_FILE, 'w') as f:
+        f.write(report + "\n")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
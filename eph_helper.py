@@ -2,18 +2,383 @@
 """
 EPH Controls Helper Script for Home Assistant
 Production-ready script for EPH zone control and monitoring
+Can run as a persistent Unix socket server that the CLI commands forward to
 """
 
 import sys
 import json
 import os
-from pyephember2.pyephember2 import EphEmber
-from typing import Dict, Any, Optional
+import random
+import signal
+import socket
+import socketserver
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from pyephember2.pyephember2 import EphEmber
+
+DEFAULT_CACHE_FILE = '/tmp/eph_zone_cache.json'
+DEFAULT_ZONE_MAPPING_FILE = '/tmp/eph_zone_mapping.json'
+DEFAULT_BREAKER_FILE = '/tmp/eph_breaker.json'
+ZONE_MAPPING_VERSION = 1
+ZONE_MAPPING_REFRESH = 24 * 3600
+
+def pyephember():
+    """Import pyephember2 on first use; server clients and cached reads never need it"""
+    from pyephember2 import pyephember2
+    return pyephember2
+
+def paho_mqtt():
+    """Import the paho MQTT client on first use; only push mode needs it"""
+    from paho.mqtt import client
+    return client
+
+def write_json_atomic(path: str, data: Any):
+    """Write JSON to path via a temporary file and rename so readers never see partial data"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+class ZoneCache:
+    """Read-through cache of zone readings with a TTL per field"""
+    
+    # CLI field name -> snapshot key
+    FIELDS = {
+        'temperature': 'current_temperature',
+        'target': 'target_temperature',
+        'active': 'is_active',
+        'boiler': 'boiler_on'
+    }
+    
+    DEFAULT_TTL = {
+        'temperature': 30,
+        'target': 30,
+        'active': 30,
+        'boiler': 30
+    }
+    
+    def __init__(self, ttl: Optional[Dict[str, float]] = None, cache_file: Optional[str] = None):
+        """Create a cache, optionally shared between processes through cache_file"""
+        self.ttl = dict(self.DEFAULT_TTL)
+        for field in self.FIELDS:
+            env_ttl = os.getenv(f'EPH_CACHE_TTL_{field.upper()}')
+            if env_ttl:
+                try:
+                    self.ttl[field] = float(env_ttl)
+                except ValueError:
+                    pass
+        if ttl:
+            self.ttl.update(ttl)
+        
+        if cache_file is None:
+            cache_file = os.getenv('EPH_CACHE_FILE', DEFAULT_CACHE_FILE)
+        self.cache_file = cache_file or None
+        
+        # zone_id -> {field: [value, timestamp]}
+        self.entries: Dict[str, Dict[str, list]] = {}
+        self._file_mtime = None
+        self._lock = threading.Lock()
+    
+    def _load(self):
+        """Reload entries from the shared cache file if another process updated it"""
+        if not self.cache_file:
+            return
+        try:
+            mtime = os.stat(self.cache_file).st_mtime_ns
+            if mtime == self._file_mtime:
+                return
+            with open(self.cache_file, 'r') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self.entries = data
+            self._file_mtime = mtime
+        except (OSError, ValueError):
+            pass
+    
+    def _save(self):
+        """Atomically write entries to the shared cache file"""
+        if not self.cache_file:
+            return
+        try:
+            write_json_atomic(self.cache_file, self.entries)
+            self._file_mtime = os.stat(self.cache_file).st_mtime_ns
+        except OSError:
+            pass
+    
+    def get(self, zone_id: str, field: str) -> Tuple[bool, Any]:
+        """Return (hit, value) for a zone field"""
+        with self._lock:
+            ttl = self.ttl.get(field, 0)
+            if ttl <= 0:
+                return False, None
+            
+            entry = self.entries.get(zone_id, {}).get(field)
+            if entry is None or entry[1] + ttl <= time.time():
+                self._load()
+                entry = self.entries.get(zone_id, {}).get(field)
+            
+            if entry is not None and entry[1] + ttl > time.time():
+                return True, entry[0]
+            return False, None
+    
+    def store(self, snapshots: List[Dict[str, Any]]):
+        """Record the readings of freshly fetched zone snapshots"""
+        now = time.time()
+        with self._lock:
+            self._load()
+            for snapshot in snapshots:
+                zone_id = snapshot.get('zone_id')
+                if not zone_id:
+                    continue
+                self.entries[zone_id] = {
+                    field: [snapshot.get(key), now]
+                    for field, key in self.FIELDS.items()
+                }
+            self._save()
+    
+    def invalidate(self, zone_id: str):
+        """Drop all cached readings for a zone"""
+        with self._lock:
+            self._load()
+            if self.entries.pop(zone_id, None) is not None:
+                self._save()
+    
+    def last_known(self, zone_id: str, max_age: float) -> Dict[str, Any]:
+        """Snapshot keys of a zone's readings recorded within max_age, ignoring the TTLs"""
+        now = time.time()
+        with self._lock:
+            self._load()
+            return {
+                self.FIELDS[field]: entry[0]
+                for field, entry in self.entries.get(zone_id, {}).items()
+                if field in self.FIELDS and entry[1] + max_age > now
+            }
+    
+    def update(self, zone_id: str, readings: Dict[str, Any]):
+        """Refresh the given fields of a zone, e.g. a target just written, keeping the others"""
+        now = time.time()
+        with self._lock:
+            self._load()
+            entry = self.entries.setdefault(zone_id, {})
+            for field, value in readings.items():
+                entry[field] = [value, now]
+            self._save()
+
+def env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+class EPHUnavailable(RuntimeError):
+    """Raised instead of calling EPH while the circuit breaker is open"""
+
+# Error text from pyephember2 that means the session must log in again
+AUTH_ERROR_MARKERS = ('401', '403', 'login', 'token')
+
+class CircuitBreaker:
+    """Stops calling EPH after repeated failures, shared between processes through state_file
+    
+    After threshold consecutive failed calls the breaker opens and calls
+    fail fast. Once reset_timeout has passed one trial call is let through:
+    success closes the breaker, failure reopens it for twice as long, up
+    to max_timeout.
+    """
+    
+    def __init__(self, threshold: Optional[int] = None, reset_timeout: Optional[float] = None,
+                 max_timeout: float = 900, state_file: Optional[str] = None):
+        self.threshold = max(1, int(env_float('EPH_BREAKER_FAILURES', 3) if threshold is None else threshold))
+        self.reset_timeout = env_float('EPH_BREAKER_RESET', 60) if reset_timeout is None else reset_timeout
+        self.max_timeout = max_timeout
+        if state_file is None:
+            state_file = os.getenv('EPH_BREAKER_FILE', DEFAULT_BREAKER_FILE)
+        self.state_file = state_file or None
+        self.state = {'failures': 0, 'opened_at': None, 'timeout': self.reset_timeout, 'trial': False}
+        self._file_mtime = None
+        self._lock = threading.Lock()
+    
+    def _load(self):
+        if not self.state_file:
+            return
+        try:
+            mtime = os.stat(self.state_file).st_mtime_ns
+            if mtime == self._file_mtime:
+                return
+            with open(self.state_file, 'r') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self.state.update(data)
+            self._file_mtime = mtime
+        except (OSError, ValueError):
+            pass
+    
+    def _save(self):
+        if not self.state_file:
+            return
+        try:
+            write_json_atomic(self.state_file, self.state)
+            self._file_mtime = os.stat(self.state_file).st_mtime_ns
+        except OSError:
+            pass
+    
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            self._load()
+            opened_at = self.state['opened_at']
+            return opened_at is not None and time.time() < opened_at + self.state['timeout']
+    
+    def allow(self) -> bool:
+        """Whether a call may go ahead, claiming the trial call once the timeout has passed"""
+        with self._lock:
+            self._load()
+            opened_at = self.state['opened_at']
+            if opened_at is None:
+                return True
+            now = time.time()
+            if now < opened_at + self.state['timeout']:
+                return False
+            # Other callers keep failing fast until the trial call reports back
+            self.state['opened_at'] = now
+            self.state['trial'] = True
+            self._save()
+            return True
+    
+    def record_success(self):
+        with self._lock:
+            self._load()
+            if self.state['failures'] or self.state['opened_at'] is not None:
+                self.state.update(failures=0, opened_at=None, timeout=self.reset_timeout, trial=False)
+                self._save()
+    
+    def record_failure(self):
+        with self._lock:
+            self._load()
+            self.state['failures'] += 1
+            if self.state['trial']:
+                self.state['timeout'] = min(self.max_timeout, self.state['timeout'] * 2)
+            elif self.state['failures'] >= self.threshold:
+                self.state['timeout'] = self.reset_timeout
+            else:
+                self._save()
+                return
+            self.state['opened_at'] = time.time()
+            self.state['trial'] = False
+            self._save()
+
+class TargetWriteQueue:
+    """Debounced, rate-limited target temperature writes
+    
+    Requests for a zone within the debounce window of its first pending
+    request collapse into one write of the last value, and every caller
+    gets that write's result. Values equal to the cached target are not
+    written. Writes are spaced at least min_interval apart, and the gap
+    doubles after each failed write up to max_backoff. A caller that gives
+    up after timeout withdraws its request if the write has not started.
+    """
+    
+    def __init__(self, write, cache: ZoneCache, window: float = 0, min_interval: Optional[float] = None,
+                 max_backoff: float = 10, timeout: float = 25):
+        self.write = write
+        self.cache = cache
+        self.window = window
+        self.min_interval = env_float('EPH_WRITE_INTERVAL', 1.0) if min_interval is None else min_interval
+        self.timeout = timeout
+        # A backoff as long as the timeout would fail every caller queued behind it
+        self.max_backoff = min(max_backoff, timeout / 2)
+        # zone_id -> {'value', 'due', 'waiters'}
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.next_write = 0.0
+        self.backoff = 0.0
+        self._cond = threading.Condition()
+        self._worker = None
+    
+    def submit(self, zone_id: str, temperature: float) -> bool:
+        """Queue a write and wait for the write that carries it (or a later value)"""
+        waiter = {'done': threading.Event(), 'ok': False}
+        with self._cond:
+            entry = self.pending.get(zone_id)
+            if entry is None:
+                hit, cached = self.cache.get(zone_id, 'target')
+                if hit and cached == temperature:
+                    return True
+                entry = {'due': time.time() + self.window, 'waiters': []}
+                self.pending[zone_id] = entry
+            entry['value'] = temperature
+            entry['waiters'].append(waiter)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="eph-writes", daemon=True)
+                self._worker.start()
+            self._cond.notify()
+        if waiter['done'].wait(self.timeout):
+            return waiter['ok']
+        with self._cond:
+            if self.pending.get(zone_id) is entry:
+                # Not started yet: withdraw so nothing is written after reporting failure
+                entry['waiters'].remove(waiter)
+                if not entry['waiters']:
+                    del self.pending[zone_id]
+                return False
+        # Already being written, so report how that write went
+        waiter['done'].wait()
+        return waiter['ok']
+    
+    def _next(self) -> Tuple[str, Dict[str, Any]]:
+        """Wait for the next zone whose window has passed and the rate limit allows"""
+        with self._cond:
+            while True:
+                if not self.pending:
+                    self._cond.wait()
+                    continue
+                zone_id, entry = min(self.pending.items(), key=lambda item: item[1]['due'])
+                delay = max(entry['due'], self.next_write) - time.time()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                return zone_id, self.pending.pop(zone_id)
+    
+    def _run(self):
+        while True:
+            zone_id, entry = self._next()
+            # A burst that ended on the current target needs no write
+            hit, cached = self.cache.get(zone_id, 'target')
+            if hit and cached == entry['value']:
+                self._finish(entry, True)
+                continue
+            try:
+                ok = bool(self.write(zone_id, entry['value']))
+            except Exception:
+                ok = False
+            with self._cond:
+                if ok:
+                    self.backoff = 0.0
+                    self.next_write = time.time() + self.min_interval
+                else:
+                    self.backoff = min(self.max_backoff, max(self.min_interval, 1.0, self.backoff * 2))
+                    self.next_write = time.time() + self.backoff
+            self._finish(entry, ok)
+    
+    @staticmethod
+    def _finish(entry: Dict[str, Any], ok: bool):
+        for waiter in entry['waiters']:
+            waiter['ok'] = ok
+            waiter['done'].set()
 
 class EPHHelper:
     """EPH Controls helper for Home Assistant integration"""
     
-    def __init__(self, username: str = None, password: str = None):
+    def __init__(self, username: str = None, password: str = None,
+                 cache: Optional[ZoneCache] = None):
         """Initialize EPH connection"""
         # Try to load .env file from known locations if environment variables aren't set
         if not os.getenv('EPH_USERNAME') or not os.getenv('EPH_PASSWORD'):
@@ -25,9 +390,65 @@ class EPHHelper:
         if not self.username or not self.password:
             raise ValueError("EPH credentials required")
         
-        self.eph = EphEmber(self.username, self.password)
+        self.cache = cache or ZoneCache()
+        self.mapping_file = os.getenv('EPH_ZONE_MAPPING_FILE', DEFAULT_ZONE_MAPPING_FILE)
+        try:
+            self.mapping_refresh = float(os.getenv('EPH_ZONE_MAPPING_REFRESH', ZONE_MAPPING_REFRESH))
+        except ValueError:
+            self.mapping_refresh = ZONE_MAPPING_REFRESH
+        
+        # Transient failures are retried with exponential backoff before counting against the breaker
+        self.breaker = CircuitBreaker()
+        self.retry_attempts = max(1, int(env_float('EPH_RETRY_ATTEMPTS', 3)))
+        self.retry_delay = env_float('EPH_RETRY_DELAY', 0.5)
+        self.retry_max_delay = 5.0
+        # How old a reading may be and still be served while EPH is unavailable
+        self.max_stale = env_float('EPH_STALE_MAX', 6 * 3600)
+        
+        self._eph = None
+        # EphEmber is not thread safe; concurrent users of this helper take this lock
+        self.lock = threading.Lock()
+        # Direct CLI calls write at once; long-running users set a debounce window
+        self.writes = TargetWriteQueue(self._write_target, self.cache)
+        # Every zone of every home as {name, zoneid, home, gatewayid}, also indexed by zone ID
+        self.zones: List[Dict[str, str]] = []
+        self.zones_by_id: Dict[str, Dict[str, str]] = {}
+        self._name_counts: Dict[str, int] = {}
         self.zone_mapping = self._build_zone_mapping()
     
+    @property
+    def eph(self) -> 'EphEmber':
+        """EPH session, logged in on first use so cached answers need no network"""
+        if self._eph is None:
+            self._eph = pyephember().EphEmber(self.username, self.password)
+        return self._eph
+    
+    def _call(self, func, *args):
+        """Call EPH with bounded retries, logging in again after auth failures
+        
+        Fails fast with EPHUnavailable while the circuit breaker is open.
+        """
+        if not self.breaker.allow():
+            raise EPHUnavailable("EPH temporarily unavailable after repeated failures")
+        
+        # A trial call after an outage gets a single attempt
+        attempts = 1 if self.breaker.state['trial'] else self.retry_attempts
+        delay = self.retry_delay
+        for attempt in range(1, attempts + 1):
+            try:
+                result = func(*args)
+            except Exception as e:
+                if self._eph is not None and any(marker in str(e).lower() for marker in AUTH_ERROR_MARKERS):
+                    self._eph.reset_login()
+                if attempt == attempts:
+                    self.breaker.record_failure()
+                    raise
+                time.sleep(min(delay, self.retry_max_delay) * random.uniform(0.5, 1.0))
+                delay *= 2
+            else:
+                self.breaker.record_success()
+                return result
+    
     def _load_env_file(self):
         """Load environment variables from .env file"""
         env_paths = [
@@ -51,86 +472,814 @@ class EPHHelper:
                 except Exception:
                     continue
     
-    def _build_zone_mapping(self) -> Dict[str, str]:
-        """Build mapping between zone names and zone IDs"""
+    def _discover_zones(self) -> List[Dict[str, str]]:
+        """Fetch the zones of every home on the account"""
+        zones = []
+        for home in self._fetch_homes():
+            for zone in home.get('zones', []):
+                if isinstance(zone, dict) and zone.get('name') and zone.get('zoneid'):
+                    zones.append({
+                        'name': zone['name'],
+                        'zoneid': zone['zoneid'],
+                        'home': home.get('name', ''),
+                        'gatewayid': home.get('gatewayid', '')
+                    })
+        return zones
+    
+    def _load_zone_mapping(self) -> Optional[Dict[str, Any]]:
+        """Load the persisted zone list if it matches this version and account and lists any zones"""
         try:
-            homes = self.eph.get_homes()
-            mapping = {}
-            
-            if isinstance(homes, list) and len(homes) > 0:
-                home = homes[0]
-                if isinstance(home, dict) and 'zones' in home:
-                    for zone in home['zones']:
-                        if isinstance(zone, dict):
-                            name = zone.get('name', 'Unknown')
-                            zone_id = zone.get('zoneid')
-                            if name and zone_id:
-                                mapping[name] = zone_id
-            
-            return mapping
-        except Exception:
-            # Fallback to discovered working mapping
-            return {"ONE": "0fed0b70485649a3af8c8b0e0a12ce57"}
+            with open(self.mapping_file, 'r') as f:
+                cached = json.load(f)
+            if (cached.get('version') == ZONE_MAPPING_VERSION and
+                    cached.get('username') == self.username and
+                    isinstance(cached.get('zones'), list) and cached['zones']):
+                return cached
+        except (OSError, ValueError, AttributeError):
+            pass
+        return None
+    
+    def _save_zone_mapping(self, zones: List[Dict[str, str]]):
+        """Persist the zone list for later invocations"""
+        try:
+            write_json_atomic(self.mapping_file, {
+                'version': ZONE_MAPPING_VERSION,
+                'timestamp': time.time(),
+                'username': self.username,
+                'zones': zones
+            })
+        except OSError as e:
+            print(f"Warning: Could not save zone mapping: {e}", file=sys.stderr)
+    
+    def _build_zone_mapping(self, refresh: bool = False) -> Dict[str, str]:
+        """Build mapping between zone names and zone IDs, using the persisted copy while fresh"""
+        cached = self._load_zone_mapping()
+        if (cached is not None and not refresh and
+                cached.get('timestamp', 0) + self.mapping_refresh > time.time()):
+            self.zones = cached['zones']
+        else:
+            try:
+                zones = self._discover_zones()
+                # A transient empty answer must not replace a mapping that resolves zones
+                if not zones:
+                    raise RuntimeError("EPH returned no zones")
+                self.zones = zones
+                self._save_zone_mapping(self.zones)
+            except Exception as e:
+                if cached is None:
+                    raise RuntimeError(f"Unable to load EPH zones: {e}")
+                # Keep using the last known mapping rather than guessing
+                print(f"Warning: Using cached zone mapping, refresh failed: {e}", file=sys.stderr)
+                self.zones = cached['zones']
+        
+        self.zones_by_id = {zone['zoneid']: zone for zone in self.zones}
+        self._name_counts = {}
+        for zone in self.zones:
+            self._name_counts[zone['name']] = self._name_counts.get(zone['name'], 0) + 1
+        
+        # A bare name resolves to its first zone, "Home/Zone" to that home's zone
+        mapping = {}
+        for zone in self.zones:
+            mapping.setdefault(zone['name'], zone['zoneid'])
+            mapping.setdefault(self.qualified_name(zone), zone['zoneid'])
+        return mapping
+    
+    @staticmethod
+    def qualified_name(zone: Dict[str, str]) -> str:
+        """Zone name prefixed with its home, e.g. Cottage/Kitchen"""
+        return f"{zone.get('home', '')}/{zone['name']}"
+    
+    def display_name(self, zone_id: str) -> str:
+        """Bare zone name when unique across homes, otherwise the qualified name"""
+        zone = self.zones_by_id.get(zone_id)
+        if zone is None:
+            return zone_id
+        return zone['name'] if self._name_counts.get(zone['name'], 0) <= 1 else self.qualified_name(zone)
+    
+    def zone_names(self) -> List[str]:
+        """Names of every zone on the account, qualified where they collide"""
+        return [self.display_name(zone['zoneid']) for zone in self.zones]
+    
+    def refresh_zone_mapping(self) -> Dict[str, str]:
+        """Rebuild the zone mapping from EPH and persist it"""
+        self.zone_mapping = self._build_zone_mapping(refresh=True)
+        return self.zone_mapping
     
     def _get_zone_id(self, zone_name: str) -> str:
         """Get internal zone ID from display name"""
         return self.zone_mapping.get(zone_name, zone_name)
     
+    def fetch_snapshots(self) -> List[Dict[str, Any]]:
+        """Fetch readings for every zone in one request and cache them"""
+        snapshots = [self._zone_snapshot(zone) for zone in self._fetch_zones()]
+        self.cache.store(snapshots)
+        return snapshots
+    
+    def last_known_snapshot(self, zone_id: str) -> Optional[Dict[str, Any]]:
+        """Cached readings of a zone past their TTL, marked stale, or None if there are none"""
+        readings = self.cache.last_known(zone_id, self.max_stale)
+        if not readings:
+            return None
+        zone = self.zones_by_id.get(zone_id, {})
+        snapshot = {'zone_name': zone.get('name'), 'zone_id': zone_id, 'home': zone.get('home')}
+        snapshot.update({key: readings.get(key) for key in ZoneCache.FIELDS.values()})
+        snapshot['stale'] = True
+        return snapshot
+    
+    def current_snapshots(self) -> List[Dict[str, Any]]:
+        """Fresh readings of every zone, or the last known ones while EPH cannot be reached"""
+        try:
+            return self.fetch_snapshots()
+        except Exception as e:
+            stale = [snapshot for snapshot in map(self.last_known_snapshot, self.zones_by_id) if snapshot]
+            if not stale:
+                raise
+            print(f"Warning: Serving last known readings, EPH request failed: {e}", file=sys.stderr)
+            return stale
+    
+    def _cached_reading(self, zone_name: str, field: str):
+        """Read a zone field from the cache, refreshing every zone on a miss"""
+        zone_id = self._get_zone_id(zone_name)
+        hit, value = self.cache.get(zone_id, field)
+        if hit:
+            return value
+        
+        for snapshot in self.current_snapshots():
+            if snapshot['zone_id'] == zone_id:
+                return snapshot.get(ZoneCache.FIELDS[field])
+        return None
+    
     def get_temperature(self, zone_name: str) -> Optional[float]:
         """Get current temperature for zone"""
         try:
-            zone_id = self._get_zone_id(zone_name)
-            temp = self.eph.get_zone_temperature(zone_id)
-            return float(temp) if temp is not None else None
+            return self._cached_reading(zone_name, 'temperature')
         except Exception:
             return None
     
     def get_target_temperature(self, zone_name: str) -> Optional[float]:
         """Get target temperature for zone"""
         try:
-            zone_id = self._get_zone_id(zone_name)
-            temp = self.eph.get_zone_target_temperature(zone_id)
-            return float(temp) if temp is not None else None
+            return self._cached_reading(zone_name, 'target')
         except Exception:
             return None
     
     def set_target_temperature(self, zone_name: str, temperature: float) -> bool:
-        """Set target temperature for zone"""
+        """Set target temperature for zone, coalesced with other writes to it
+        
+        Must not be called while holding self.lock, which the write takes.
+        """
         try:
-            zone_id = self._get_zone_id(zone_name)
-            # Note: Check if pyephember2 has set_zone_target_temperature method
-            result = self.eph.set_zone_target_temperature(zone_id, temperature)
-            return result is not None
+            return self.writes.submit(self._get_zone_id(zone_name), temperature)
         except Exception:
             return False
     
+    def _write_target(self, zone_id: str, temperature: float) -> bool:
+        """Write a target temperature to EPH, caching it on success"""
+        def write():
+            with self.lock:
+                return self.eph.set_zone_target_temperature(zone_id, temperature)
+        
+        try:
+            # pyephember2 returns whether the command was published; False is a failed write
+            ok = bool(self._call(write))
+        except Exception:
+            ok = False
+        if ok:
+            self.cache.update(zone_id, {'target': temperature})
+        else:
+            self.cache.invalidate(zone_id)
+        return ok
+    
     def is_zone_active(self, zone_name: str) -> Optional[bool]:
         """Check if zone is actively heating"""
         try:
-            zone_id = self._get_zone_id(zone_name)
-            return self.eph.is_zone_active(zone_id)
+            return self._cached_reading(zone_name, 'active')
         except Exception:
             return None
     
     def is_boiler_on(self, zone_name: str) -> Optional[bool]:
         """Check if boiler is on for zone"""
+        try:
+            return self._cached_reading(zone_name, 'boiler')
+        except Exception:
+            return None
+    
+    def _fetch_homes(self) -> List[Dict[str, Any]]:
+        """Fetch every home with its zones, retried and guarded by the circuit breaker"""
+        return self._call(self._load_homes)
+    
+    def _load_homes(self) -> List[Dict[str, Any]]:
+        """Load every home with its zones through the session's own get_homes()
+        
+        Homes load one after another. pyephember2 has no supported call for a
+        single home's zones and EphEmber is not thread safe, so there is no
+        safe way to fetch homes concurrently; callers sharing the helper hold
+        self.lock as for any other EPH request.
+        """
+        homes = self.eph.get_homes()
+        if not isinstance(homes, list):
+            raise RuntimeError("Unexpected response listing EPH homes")
+        return [home for home in homes if isinstance(home, dict)]
+    
+    def _fetch_zones(self) -> List[Dict[str, Any]]:
+        """Fetch the payload for every zone of every home"""
+        zones = []
+        for home in self._fetch_homes():
+            zones.extend(z for z in home.get('zones', []) if isinstance(z, dict))
+        return zones
+    
+    @staticmethod
+    def _zone_value(func, zone: Dict[str, Any]):
+        """Derive a single reading from a zone payload, None if unavailable"""
+        try:
+            return func(zone)
+        except Exception:
+            return None
+    
+    def _zone_snapshot(self, zone: Dict[str, Any]) -> Dict[str, Any]:
+        """Derive all readings for a zone from its payload"""
+        eph = pyephember()
+        current = self._zone_value(eph.zone_current_temperature, zone)
+        target = self._zone_value(eph.zone_target_temperature, zone)
+        boiler = self._zone_value(eph.boiler_state, zone)
+        mode = self._zone_value(eph.zone_mode, zone)
+        
+        return {
+            'zone_name': zone.get('name'),
+            'zone_id': zone.get('zoneid'),
+            'home': self.zones_by_id.get(zone.get('zoneid'), {}).get('home'),
+            'current_temperature': float(current) if current is not None else None,
+            'target_temperature': float(target) if target is not None else None,
+            'is_active': self._zone_value(eph.zone_is_active, zone),
+            'boiler_on': boiler == 2 if boiler is not None else None,
+            'mode': mode.name if mode is not None else None,
+            'boost_active': self._zone_value(eph.zone_is_boost_active, zone),
+            'boost_temperature': self._zone_value(eph.zone_boost_temperature, zone),
+            'device_type': zone.get('deviceType'),
+            'point_data': {
+                str(point.get('pointIndex')): point.get('value')
+                for point in zone.get('pointDataList', [])
+                if isinstance(point, dict)
+            }
+        }
+    
+    def get_all_zone_snapshots(self, home: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Get readings for every zone (or one home's zones), keyed by display name"""
+        return {
+            self.display_name(snapshot['zone_id']): snapshot
+            for snapshot in self.current_snapshots()
+            if home is None or snapshot['home'] == home
+        }
+    
+    def get_zone_snapshot(self, zone_name: str) -> Optional[Dict[str, Any]]:
+        """Get all readings for a zone from a single fetch"""
         try:
             zone_id = self._get_zone_id(zone_name)
-            return self.eph.is_zone_boiler_on(zone_id)
+            for snapshot in self.current_snapshots():
+                if snapshot['zone_id'] == zone_id:
+                    return snapshot
+            return None
         except Exception:
             return None
     
     def get_zone_status(self, zone_name: str) -> Dict[str, Any]:
         """Get comprehensive zone status"""
-        return {
+        return self.zone_status(zone_name, self.get_zone_snapshot(zone_name))
+    
+    def zone_status(self, zone_name: str, snapshot: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Status of a zone from its snapshot, with the known zone names"""
+        snapshot = snapshot or {}
+        status = {
             'zone_name': zone_name,
             'zone_id': self._get_zone_id(zone_name),
-            'current_temperature': self.get_temperature(zone_name),
-            'target_temperature': self.get_target_temperature(zone_name),
-            'is_active': self.is_zone_active(zone_name),
-            'boiler_on': self.is_boiler_on(zone_name),
-            'available_zones': list(self.zone_mapping.keys())
+            'current_temperature': snapshot.get('current_temperature'),
+            'target_temperature': snapshot.get('target_temperature'),
+            'is_active': snapshot.get('is_active'),
+            'boiler_on': snapshot.get('boiler_on'),
+            'available_zones': self.zone_names()
+        }
+        for key, value in snapshot.items():
+            status.setdefault(key, value)
+        return status
+    
+    def get_all_zone_status(self, home: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Get status for every zone in one call, optionally limited to one home"""
+        try:
+            return self.get_all_zone_snapshots(home)
+        except Exception:
+            return {}
+
+class AsyncEPHHelper:
+    """Coroutine facade over EPHHelper sharing its session and reading cache
+    
+    Calls run in a bounded thread pool. EphEmber is not thread safe, so they
+    take one session lock, and the gain comes from coalescing: every zone
+    read missing the cache while a fetch is in flight awaits that same
+    fetch, so reading the whole house costs one round trip. Identical
+    concurrent writes also share one request.
+    """
+    
+    def __init__(self, helper: Optional[EPHHelper] = None, max_concurrency: int = 4,
+                 lock: Optional[threading.Lock] = None):
+        from concurrent.futures import ThreadPoolExecutor
+        self.helper = helper or EPHHelper()
+        self.max_concurrency = max(1, max_concurrency)
+        self.lock = lock or self.helper.lock
+        self.helper.writes.window = env_float('EPH_WRITE_DEBOUNCE', 2.0)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='eph')
+        self._semaphore = None
+        self._inflight: Dict[Tuple, Any] = {}
+    
+    @classmethod
+    async def create(cls, **kwargs) -> 'AsyncEPHHelper':
+        """Create a facade, loading credentials and zones off the event loop"""
+        import asyncio
+        helper = await asyncio.get_running_loop().run_in_executor(None, EPHHelper)
+        return cls(helper, **kwargs)
+    
+    async def __aenter__(self) -> 'AsyncEPHHelper':
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.close()
+    
+    async def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _call_locked(self, func, *args):
+        with self.lock:
+            return func(*args)
+    
+    async def _run(self, func, *args):
+        """Run a blocking helper call in the pool, at most max_concurrency at a time"""
+        import asyncio
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, self._call_locked, func, *args)
+    
+    @staticmethod
+    async def _write(func, *args):
+        """Run a write in its own thread, so its debounce wait never holds up reads"""
+        import asyncio
+        return await asyncio.to_thread(func, *args)
+    
+    async def _coalesced(self, key: Tuple, func, *args, write: bool = False):
+        """Run func once for all concurrent callers using the same key"""
+        import asyncio
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._write(func, *args) if write else self._run(func, *args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # One caller being cancelled must not cancel the shared request
+        return await asyncio.shield(task)
+    
+    async def fetch_snapshots(self) -> Dict[str, Dict[str, Any]]:
+        """Readings of every zone keyed by zone ID, from one shared fetch"""
+        snapshots = await self._coalesced(('snapshots',), self.helper.current_snapshots)
+        return {snapshot['zone_id']: snapshot for snapshot in snapshots}
+    
+    async def get_zone_snapshot(self, zone_name: str) -> Optional[Dict[str, Any]]:
+        """Get all readings for a zone from a single fetch"""
+        try:
+            return (await self.fetch_snapshots()).get(self.helper._get_zone_id(zone_name))
+        except Exception:
+            return None
+    
+    async def _cached_reading(self, zone_name: str, field: str):
+        zone_id = self.helper._get_zone_id(zone_name)
+        hit, value = self.helper.cache.get(zone_id, field)
+        if hit:
+            return value
+        try:
+            snapshot = (await self.fetch_snapshots()).get(zone_id)
+        except Exception:
+            return None
+        return snapshot.get(ZoneCache.FIELDS[field]) if snapshot is not None else None
+    
+    async def get_temperature(self, zone_name: str) -> Optional[float]:
+        """Get current temperature for zone"""
+        return await self._cached_reading(zone_name, 'temperature')
+    
+    async def get_target_temperature(self, zone_name: str) -> Optional[float]:
+        """Get target temperature for zone"""
+        return await self._cached_reading(zone_name, 'target')
+    
+    async def is_zone_active(self, zone_name: str) -> Optional[bool]:
+        """Check if zone is actively heating"""
+        return await self._cached_reading(zone_name, 'active')
+    
+    async def is_boiler_on(self, zone_name: str) -> Optional[bool]:
+        """Check if boiler is on for zone"""
+        return await self._cached_reading(zone_name, 'boiler')
+    
+    async def set_target_temperature(self, zone_name: str, temperature: float) -> bool:
+        """Set target temperature for zone"""
+        # The write queue takes the session lock itself once its debounce window has passed
+        key = ('set_target', self.helper._get_zone_id(zone_name), temperature)
+        return await self._coalesced(key, self.helper.set_target_temperature, zone_name, temperature, write=True)
+    
+    async def get_zone_status(self, zone_name: str) -> Dict[str, Any]:
+        """Get comprehensive zone status"""
+        return self.helper.zone_status(zone_name, await self.get_zone_snapshot(zone_name))
+    
+    async def get_all_zone_status(self, home: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Get status for every zone in one call, optionally limited to one home"""
+        try:
+            snapshots = await self.fetch_snapshots()
+        except Exception:
+            return {}
+        return {
+            self.helper.display_name(zone_id): snapshot
+            for zone_id, snapshot in snapshots.items()
+            if home is None or snapshot['home'] == home
+        }
+    
+    async def refresh_zone_mapping(self) -> Dict[str, str]:
+        """Rebuild the zone mapping from EPH and persist it"""
+        return await self._coalesced(('zones',), self.helper.refresh_zone_mapping)
+
+# Byte length of each point value type in Ember pointData records
+POINT_VALUE_SIZES = {1: 1, 2: 2, 4: 2, 5: 4}
+# Temperature types, sent as tenths of a degree and possibly negative
+SIGNED_POINT_TYPES = (2, 4)
+
+def decode_point_data(encoded: str) -> List[Tuple[int, int]]:
+    """Decode a base64 pointData payload into (pointIndex, value) records
+    
+    Each record is [0, index, type] followed by a big-endian value whose
+    length depends on the type. Decoding stops at an unknown type.
+    """
+    import base64
+    data = base64.b64decode(encoded)
+    records = []
+    offset = 0
+    while offset + 3 <= len(data):
+        index, type_id = data[offset + 1], data[offset + 2]
+        size = POINT_VALUE_SIZES.get(type_id)
+        if size is None or offset + 3 + size > len(data):
+            break
+        value = int.from_bytes(data[offset + 3:offset + 3 + size], 'big', signed=type_id in SIGNED_POINT_TYPES)
+        records.append((index, value))
+        offset += 3 + size
+    return records
+
+class EPHPushBridge:
+    """Keeps zone readings current from the Ember MQTT point-data stream and republishes them to Home Assistant
+    
+    Zone payloads are fetched once, then patched with each pushed pointData
+    record and re-read with the pyephember2 zone helpers, so no polling is
+    needed. Changed readings go to the reading cache and, through MQTT
+    discovery, to a local broker. Both MQTT clients can be passed in.
+    
+    Cached readings keep the time they were pushed or fetched. Pushes only
+    report changes, so the zones are also reloaded over REST every
+    resync_interval seconds (EPH_PUSH_RESYNC, default just under the
+    shortest cache TTL, 0 to disable); if both the stream and EPH go quiet
+    the readings expire and are served as stale.
+    """
+    
+    # (component, snapshot key, entity name, extra discovery fields)
+    ENTITIES = [
+        ('sensor', 'current_temperature', 'Temperature',
+         {'device_class': 'temperature', 'unit_of_measurement': '°C', 'state_class': 'measurement'}),
+        ('sensor', 'target_temperature', 'Target temperature',
+         {'device_class': 'temperature', 'unit_of_measurement': '°C'}),
+        ('binary_sensor', 'is_active', 'Active', {}),
+        ('binary_sensor', 'boiler_on', 'Boiler', {'device_class': 'heat'}),
+    ]
+    
+    def __init__(self, helper: EPHHelper, local_client=None, discovery_prefix: Optional[str] = None,
+                 state_prefix: Optional[str] = None, lock: Optional[threading.Lock] = None):
+        self.helper = helper
+        self.local_client = local_client
+        self.discovery_prefix = discovery_prefix or os.getenv('EPH_MQTT_DISCOVERY_PREFIX', 'homeassistant')
+        self.state_prefix = state_prefix or os.getenv('EPH_MQTT_STATE_PREFIX', 'eph')
+        # Guards the zone table and any helper call
+        self.lock = lock or helper.lock
+        self.zones: Dict[str, Dict[str, Any]] = {}
+        self.states: Dict[str, Dict[str, Any]] = {}
+        self.cloud_client = None
+        self._subscribed = False
+        ttls = [ttl for ttl in helper.cache.ttl.values() if ttl > 0]
+        self.resync_interval = env_float('EPH_PUSH_RESYNC', max(1.0, min(ttls) * 0.8) if ttls else 0)
+        self._resync = threading.Event()
+        self._stop = threading.Event()
+    
+    @property
+    def availability_topic(self) -> str:
+        return f"{self.state_prefix}/status"
+    
+    def state_topic(self, zone_id: str) -> str:
+        return f"{self.state_prefix}/{zone_id}/state"
+    
+    def connect_local(self):
+        """Connect to the Home Assistant broker (EPH_MQTT_HOST, EPH_MQTT_PORT, EPH_MQTT_USERNAME, EPH_MQTT_PASSWORD)"""
+        if self.local_client is None:
+            mqtt = paho_mqtt()
+            client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, f"eph_helper_{os.getpid()}")
+            if os.getenv('EPH_MQTT_USERNAME'):
+                client.username_pw_set(os.getenv('EPH_MQTT_USERNAME'), os.getenv('EPH_MQTT_PASSWORD'))
+            client.will_set(self.availability_topic, 'offline', retain=True)
+            client.connect(os.getenv('EPH_MQTT_HOST', 'localhost'), int(os.getenv('EPH_MQTT_PORT', '1883')))
+            client.loop_start()
+            self.local_client = client
+        self.local_client.publish(self.availability_topic, 'online', retain=True)
+    
+    def resync(self):
+        """Reload every zone payload over REST, e.g. after pushes may have been missed"""
+        with self.lock:
+            zones = self.helper._fetch_zones()
+            self.zones = {zone['mac']: zone for zone in zones if zone.get('mac')}
+            changed = [self._update_state(zone) for zone in self.zones.values()]
+        for snapshot in changed:
+            if snapshot is not None:
+                self.publish_discovery(snapshot)
+                self.publish_state(snapshot)
+    
+    def topics(self) -> List[str]:
+        """Point-data upload topics of the known zones"""
+        return sorted({f"{zone['productId']}/{zone['uid']}/upload/pointdata"
+                       for zone in self.zones.values() if zone.get('productId') and zone.get('uid')})
+    
+    def _update_state(self, zone: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Re-read a zone payload, caching and returning its snapshot if any reading changed"""
+        snapshot = self.helper._zone_snapshot(zone)
+        previous = self.states.get(snapshot['zone_id'])
+        self.states[snapshot['zone_id']] = snapshot
+        self.helper.cache.store([snapshot])
+        return snapshot if snapshot != previous else None
+    
+    def handle_pointdata(self, payload: bytes) -> Optional[Dict[str, Any]]:
+        """Apply one upload/pointdata message, returning the zone snapshot if it changed"""
+        try:
+            data = json.loads(payload).get('data', {})
+            records = decode_point_data(data.get('pointData', ''))
+        except (ValueError, TypeError, AttributeError) as e:
+            print(f"Warning: Ignoring malformed point data: {e}", file=sys.stderr)
+            return None
+        
+        with self.lock:
+            zone = self.zones.get(data.get('mac'))
+            if zone is None or not records:
+                return None
+            points = {point.get('pointIndex'): point for point in zone.setdefault('pointDataList', [])}
+            for index, value in records:
+                if index in points:
+                    points[index]['value'] = value
+                else:
+                    zone['pointDataList'].append({'pointIndex': index, 'value': value})
+            snapshot = self._update_state(zone)
+        
+        if snapshot is not None:
+            self.publish_state(snapshot)
+        return snapshot
+    
+    def publish_discovery(self, snapshot: Dict[str, Any]):
+        """Announce a zone's entities through Home Assistant MQTT discovery"""
+        zone_id = snapshot['zone_id']
+        device = {
+            'identifiers': [f"eph_{zone_id}"],
+            'name': f"EPH {self.helper.display_name(zone_id)}",
+            'manufacturer': 'EPH Controls'
         }
+        for component, key, name, extra in self.ENTITIES:
+            object_id = f"eph_{zone_id}_{key}"
+            if component == 'binary_sensor':
+                template = f"{{{{ 'ON' if value_json.{key} else 'OFF' }}}}"
+            else:
+                template = f"{{{{ value_json.{key} }}}}"
+            config = {
+                'name': name,
+                'unique_id': object_id,
+                'object_id': object_id,
+                'state_topic': self.state_topic(zone_id),
+                'value_template': template,
+                'availability_topic': self.availability_topic,
+                'device': device
+            }
+            config.update(extra)
+            self.local_client.publish(f"{self.discovery_prefix}/{component}/{object_id}/config",
+                                      json.dumps(config), retain=True)
+    
+    def publish_state(self, snapshot: Dict[str, Any]):
+        self.local_client.publish(self.state_topic(snapshot['zone_id']), json.dumps(snapshot), retain=True)
+    
+    def on_cloud_connect(self, client, userdata, flags, reason_code, properties=None):
+        if getattr(reason_code, 'is_failure', False):
+            print(f"EPH MQTT connection refused: {reason_code}", file=sys.stderr)
+            return
+        for topic in self.topics():
+            client.subscribe(topic)
+        # Pushes sent while disconnected are lost, so catch up once on reconnect
+        if self._subscribed:
+            self._resync.set()
+        self._subscribed = True
+    
+    def on_cloud_message(self, client, userdata, message):
+        if message.topic.endswith('/upload/pointdata'):
+            self.handle_pointdata(message.payload)
+    
+    def run(self, cloud_client=None):
+        """Load the zones, subscribe to their pushes and resync them periodically until stopped"""
+        self.connect_local()
+        self.resync()
+        callbacks = {'on_connect': self.on_cloud_connect, 'on_message': self.on_cloud_message}
+        if cloud_client is None:
+            with self.lock:
+                cloud_client = self.helper.eph.messenger.start(callbacks=callbacks)
+        else:
+            for key, callback in callbacks.items():
+                setattr(cloud_client, key, callback)
+        cloud_client.loop_start()
+        self.cloud_client = cloud_client
+        
+        # Resync on reconnect and on the timer; readings are never re-stored without a fresh fetch
+        try:
+            while not self._stop.is_set():
+                self._resync.wait(self.resync_interval if self.resync_interval > 0 else None)
+                self._resync.clear()
+                if self._stop.is_set():
+                    break
+                try:
+                    self.resync()
+                except Exception as e:
+                    print(f"Warning: Zone resync failed: {e}", file=sys.stderr)
+        finally:
+            cloud_client.loop_stop()
+            cloud_client.disconnect()
+            self.local_client.publish(self.availability_topic, 'offline', retain=True)
+    
+    def stop(self):
+        self._stop.set()
+        self._resync.set()
+
+DEFAULT_SOCKET_PATH = '/tmp/eph_helper.sock'
+
+class CommandError(Exception):
+    """Raised for invalid or incomplete command line input"""
+
+def run_command(helper: EPHHelper, command: str, args: List[str]) -> str:
+    """Execute a CLI command against a helper and return its output"""
+    if command == "zones":
+        if args and args[0] == "--refresh":
+            helper.refresh_zone_mapping()
+        return json.dumps(helper.zone_names())
+    
+    if command in ("status_all", "snapshot"):
+        return json.dumps(helper.get_all_zone_status(args[0] if args else None), indent=2)
+    
+    if len(args) < 1:
+        raise CommandError("Zone name required")
+    
+    zone_name = args[0]
+    
+    if command == "temperature":
+        temp = helper.get_temperature(zone_name)
+        return str(temp) if temp is not None else "null"
+    
+    elif command == "target":
+        temp = helper.get_target_temperature(zone_name)
+        return str(temp) if temp is not None else "null"
+    
+    elif command == "set_target":
+        if len(args) < 2:
+            raise CommandError("Temperature value required")
+        try:
+            temp = float(args[1])
+        except ValueError:
+            raise CommandError(f"Invalid temperature: {args[1]}")
+        result = helper.set_target_temperature(zone_name, temp)
+        return "success" if result else "failed"
+    
+    elif command == "active":
+        active = helper.is_zone_active(zone_name)
+        return str(active).lower() if active is not None else "null"
+    
+    elif command == "boiler":
+        boiler = helper.is_boiler_on(zone_name)
+        return str(boiler).lower() if boiler is not None else "null"
+    
+    elif command == "status":
+        status = helper.get_zone_status(zone_name)
+        return json.dumps(status, indent=2)
+    
+    raise CommandError(f"Unknown command: {command}")
+
+class EPHRequestHandler(socketserver.StreamRequestHandler):
+    """Handles newline-delimited JSON requests from eph_helper.py clients"""
+    
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                output = self.server.execute(request['command'], request.get('args', []))
+                response = {'ok': True, 'output': output}
+            except CommandError as e:
+                response = {'ok': False, 'error': str(e)}
+            except Exception as e:
+                response = {'ok': False, 'error': f"Server error: {e}"}
+            
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+class EPHServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Long-running server keeping one authenticated EPH session alive"""
+    
+    daemon_threads = True
+    
+    def __init__(self, socket_path: str, helper: EPHHelper):
+        self.socket_path = socket_path
+        self.helper = helper
+        # EphEmber is not thread safe, so calls into the helper are serialised
+        self.helper_lock = helper.lock
+        # Bursts of set_target from automations collapse into one write per zone
+        helper.writes.window = env_float('EPH_WRITE_DEBOUNCE', 2.0)
+        
+        if os.path.exists(socket_path):
+            try:
+                running = query_server(socket_path, "zones", []) is not None
+            except (OSError, ValueError):
+                # Something accepted the connection, so treat it as a server that is busy
+                running = True
+            if running:
+                raise RuntimeError(f"EPH helper server already running on {socket_path}")
+            os.unlink(socket_path)
+        
+        super().__init__(socket_path, EPHRequestHandler)
+        os.chmod(socket_path, 0o600)
+    
+    def execute(self, command: str, args: List[str]) -> str:
+        """Run a command against the shared helper"""
+        if command == "set_target":
+            # Waits in the write queue, which takes the lock only for the write itself
+            return run_command(self.helper, command, args)
+        with self.helper_lock:
+            return run_command(self.helper, command, args)
+    
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
+
+def query_server(socket_path: str, command: str, args: List[str],
+                 timeout: float = 30) -> Optional[Dict[str, Any]]:
+    """Send a command to a running server, returning None if none is listening
+    
+    Once connected the request may already be executing, so a timeout,
+    dropped connection or malformed reply raises rather than returning None.
+    """
+    if not os.path.exists(socket_path):
+        return None
+    
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        return None
+    
+    try:
+        request = json.dumps({'command': command, 'args': args})
+        sock.sendall(request.encode('utf-8') + b'\n')
+        with sock.makefile('rb') as response:
+            line = response.readline()
+        if not line:
+            raise ConnectionError("server closed the connection without answering")
+        return json.loads(line)
+    finally:
+        sock.close()
+
+def serve(socket_path: str):
+    """Run the EPH helper server until interrupted"""
+    helper = EPHHelper()
+    server = EPHServer(socket_path, helper)
+    
+    def shutdown(signum, frame):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+    
+    signal.signal(signal.SIGTERM, shutdown)
+    print(f"EPH helper listening on {socket_path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def push():
+    """Run the MQTT push bridge until interrupted"""
+    bridge = EPHPushBridge(EPHHelper())
+    signal.signal(signal.SIGTERM, lambda signum, frame: bridge.stop())
+    print("EPH push bridge running", file=sys.stderr)
+    try:
+        bridge.run()
+    except KeyboardInterrupt:
+        pass
 
 def main():
     """Command line interface"""
@@ -143,62 +1292,68 @@ def main():
         print("  active <zone_name>                - Check if zone is active")
         print("  boiler <zone_name>                - Check if boiler is on")
         print("  status <zone_name>                - Get full zone status")
-        print("  zones                             - List available zones")
+        print("  status_all [home]                 - Get full status of every zone, or of one home's zones")
+        print("  zones [--refresh]                 - List available zones (--refresh reloads them from EPH)")
+        print("Zone names may be qualified with their home, e.g. \"Cottage/Kitchen\", when homes share zone names")
+        print("  serve [socket_path]               - Run persistent server for the commands above")
+        print("  push                              - Mirror EPH MQTT pushes to the cache and Home Assistant MQTT")
         print("\nCredentials: Set EPH_USERNAME and EPH_PASSWORD environment variables")
+        print(f"Server socket: EPH_HELPER_SOCKET (default {DEFAULT_SOCKET_PATH})")
+        print("Push mode broker: EPH_MQTT_HOST (default localhost), EPH_MQTT_PORT, EPH_MQTT_USERNAME, EPH_MQTT_PASSWORD")
+        print("Push mode resync: EPH_PUSH_RESYNC seconds between REST reloads (default just under the cache TTL, 0 disables)")
+        print("Server writes: EPH_WRITE_DEBOUNCE seconds to collapse set_target bursts (default 2), "
+              "EPH_WRITE_INTERVAL minimum seconds between writes (default 1)")
+        print(f"Outages: EPH_RETRY_ATTEMPTS (default 3), EPH_BREAKER_FAILURES (default 3), EPH_BREAKER_RESET seconds "
+              f"(default 60), EPH_BREAKER_FILE (default {DEFAULT_BREAKER_FILE}), EPH_STALE_MAX seconds (default 6 hours)")
+        print(f"Reading cache: EPH_CACHE_TTL_<TEMPERATURE|TARGET|ACTIVE|BOILER> seconds, "
+              f"EPH_CACHE_FILE (default {DEFAULT_CACHE_FILE}, empty to disable sharing)")
         sys.exit(1)
     
     command = sys.argv[1].lower()
+    args = sys.argv[2:]
+    socket_path = os.getenv('EPH_HELPER_SOCKET', DEFAULT_SOCKET_PATH)
+    
+    if command == "serve":
+        try:
+            serve(args[0] if args else socket_path)
+        except (ValueError, RuntimeError, OSError) as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+    
+    if command == "push":
+        try:
+            push()
+        except (ValueError, RuntimeError, OSError) as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+    
+    # Use the persistent server when one is running; only run directly if none accepts the connection
+    try:
+        response = query_server(socket_path, command, args)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: EPH helper server did not answer: {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    if response is not None:
+        if response.get('ok'):
+            print(response['output'])
+            return
+        print(f"ERROR: {response.get('error')}", file=sys.stderr)
+        sys.exit(1)
     
     try:
         helper = EPHHelper()
-    except ValueError as e:
+    except (ValueError, RuntimeError) as e:
         print(f"ERROR: {e}", file=sys.stderr)
         sys.exit(1)
     
     try:
-        if command == "zones":
-            zones = list(helper.zone_mapping.keys())
-            print(json.dumps(zones))
-        
-        elif len(sys.argv) < 3:
-            print("ERROR: Zone name required", file=sys.stderr)
-            sys.exit(1)
-        
-        else:
-            zone_name = sys.argv[2]
-            
-            if command == "temperature":
-                temp = helper.get_temperature(zone_name)
-                print(temp if temp is not None else "null")
-            
-            elif command == "target":
-                temp = helper.get_target_temperature(zone_name)
-                print(temp if temp is not None else "null")
-            
-            elif command == "set_target":
-                if len(sys.argv) < 4:
-                    print("ERROR: Temperature value required", file=sys.stderr)
-                    sys.exit(1)
-                temp = float(sys.argv[3])
-                result = helper.set_target_temperature(zone_name, temp)
-                print("success" if result else "failed")
-            
-            elif command == "active":
-                active = helper.is_zone_active(zone_name)
-                print(str(active).lower() if active is not None else "null")
-            
-            elif command == "boiler":
-                boiler = helper.is_boiler_on(zone_name)
-                print(str(boiler).lower() if boiler is not None else "null")
-            
-            elif command == "status":
-                status = helper.get_zone_status(zone_name)
-                print(json.dumps(status, indent=2))
-            
-            else:
-                print(f"ERROR: Unknown command: {command}", file=sys.stderr)
-                sys.exit(1)
-                
+        print(run_command(helper, command, args))
+    except CommandError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
     except Exception as e:
         print(f"ERROR: {e}", file=sys.stderr)
         sys.exit(1)
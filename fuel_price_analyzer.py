@@ -4,39 +4,129 @@ Fuel Price Analyzer - Python replacement for Home Assistant YAML templates
 Fetches fuel prices from multiple APIs and finds stations near a given postcode
 """
 
-import urllib.request
-import urllib.error
+import http.client
+import http.server
+import urllib.parse
 import ssl
-import gzip
+import codecs
+import csv
 import json
+import math
+import os
 import re
+import sys
+import threading
 import time
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
+import zlib
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, as_completed
+from array import array
+from collections.abc import Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
+from enum import Enum
+
+DEFAULT_FEED_CACHE_DIR = '/tmp/fuel_feed_cache'
+NAN = float('nan')
+DEFAULT_MAX_DISTANCE_KM = 25.0
+DEFAULT_CENTROIDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'postcode_centroids.csv')
+
+class FuelType(str, Enum):
+    """Canonical fuel grades; retailer codes are mapped onto these at ingest"""
+    E10 = 'E10'
+    E5 = 'E5'
+    B7 = 'B7'
+    SDV = 'SDV'
+    B10 = 'B10'
+    HVO = 'HVO'
+    LPG = 'LPG'
+    KEROSENE = 'KEROSENE'
+    GAS_OIL = 'GAS_OIL'
+    
+    def __str__(self) -> str:
+        return self.value
+    
+    @classmethod
+    def parse(cls, code) -> Optional['FuelType']:
+        """Canonical fuel type for a retailer code or name, None if unrecognised"""
+        if code is None:
+            return None
+        return FUEL_TYPE_ALIASES.get(re.sub(r'[^A-Z0-9]', '', str(code).upper()))
+
+# Retailer fuel codes, upper-cased with punctuation and spaces removed
+FUEL_TYPE_ALIASES: Dict[str, FuelType] = {
+    'E10': FuelType.E10, 'UNLEADED': FuelType.E10, 'PETROL': FuelType.E10,
+    'E5': FuelType.E5, 'SUPERUNLEADED': FuelType.E5, 'PREMIUMUNLEADED': FuelType.E5, 'SUPER': FuelType.E5,
+    'B7': FuelType.B7, 'DIESEL': FuelType.B7, 'STANDARDDIESEL': FuelType.B7,
+    'SDV': FuelType.SDV, 'SUPERDIESEL': FuelType.SDV, 'PREMIUMDIESEL': FuelType.SDV,
+    'B10': FuelType.B10,
+    'HVO': FuelType.HVO, 'HVO100': FuelType.HVO,
+    'LPG': FuelType.LPG, 'AUTOGAS': FuelType.LPG,
+    'KEROSENE': FuelType.KEROSENE, 'HEATINGOIL': FuelType.KEROSENE, 'C1': FuelType.KEROSENE,
+    'GASOIL': FuelType.GAS_OIL, 'REDDIESEL': FuelType.GAS_OIL,
+}
+
+def normalize_price(value) -> Optional[float]:
+    """Price in pence per litre; feeds quoting pounds per litre are scaled up"""
+    try:
+        price = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not price > 0:
+        return None
+    if price < 10:  # Assume £/L if under 10
+        price *= 100
+    return round(price, 2)
+
+def normalize_prices(raw_prices: Optional[Dict]) -> Dict[FuelType, float]:
+    """Map a feed's prices onto canonical fuel types in pence per litre"""
+    prices: Dict[FuelType, float] = {}
+    if not isinstance(raw_prices, dict):
+        return prices
+    for code, value in raw_prices.items():
+        fuel = FuelType.parse(code)
+        price = normalize_price(value)
+        # An exact canonical code beats an alias for the same grade
+        if fuel is not None and price is not None and (fuel not in prices or code == fuel.value):
+            prices[fuel] = price
+    return prices
 
 @dataclass
 class FuelStation:
-    """Represents a fuel station with pricing data"""
+    """Represents a fuel station with pricing data
+    
+    Prices are keyed by FuelType in pence per litre once the station has
+    been through FuelPriceAPI.parse_record.
+    """
     site_id: str
     brand: str
     name: str
     postcode: str
     address: str
-    prices: Dict[str, float]
+    prices: Dict[FuelType, float]
     distance_km: Optional[float] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'FuelStation':
+        """Rebuild a station from asdict() output, e.g. after a JSON round trip"""
+        prices = {}
+        for code, price in (data.get('prices') or {}).items():
+            fuel = FuelType.parse(code)
+            if fuel is not None and price is not None:
+                prices[fuel] = price
+        return cls(**{**data, 'prices': prices})
+    
+    def get_price(self, fuel) -> Optional[float]:
+        """Get a fuel type's price in £/L"""
+        price = self.prices.get(FuelType.parse(fuel))
+        return price / 100 if price is not None else None
     
     def get_diesel_price(self) -> Optional[float]:
-        """Get diesel price in £/L, trying different fuel type keys"""
-        fuel_keys = ['B7', 'diesel', 'Diesel', 'DIESEL', 'gasoil', 'gas_oil']
-        for key in fuel_keys:
-            if key in self.prices and self.prices[key] is not None:
-                # Convert from pence to pounds if needed
-                price = self.prices[key]
-                if price > 10:  # Assume pence if > £10/L
-                    return price / 100
-                return price
-        return None
+        """Get diesel price in £/L"""
+        price = self.prices.get(FuelType.B7)
+        return price / 100 if price is not None else None
 
 @dataclass
 class PostcodeInfo:
@@ -45,148 +135,644 @@ class PostcodeInfo:
     outcode: str
     area: str
 
+class TransportResponse:
+    """Response from HTTPTransport; returns its connection to the pool once closed"""
+    
+    def __init__(self, transport: 'HTTPTransport', key: Tuple[str, str, int],
+                 connection: http.client.HTTPConnection, response: http.client.HTTPResponse, url: str):
+        self._transport = transport
+        self._key = key
+        self._connection = connection
+        self._response = response
+        self.url = url
+        self.status = response.status
+        self.reason = response.reason
+    
+    def getcode(self) -> int:
+        return self.status
+    
+    def getheader(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        return self._response.getheader(name, default)
+    
+    def read(self, amt: Optional[int] = None) -> bytes:
+        return self._response.read(amt)
+    
+    def read1(self, amt: int = -1) -> bytes:
+        """Read what is available, up to amt bytes, with at most one socket read"""
+        return self._response.read1(amt)
+    
+    def settimeout(self, timeout: float):
+        """Bound how long each further read of the body may block"""
+        if self._connection is not None and self._connection.sock is not None:
+            self._connection.sock.settimeout(timeout)
+    
+    def close(self):
+        """Release the connection, keeping it alive only if the body was fully read"""
+        if self._connection is None:
+            return
+        connection, self._connection = self._connection, None
+        if self._response.isclosed() and not self._response.will_close:
+            self._transport._release(self._key, connection)
+        else:
+            self._response.close()
+            connection.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class HTTPTransport:
+    """HTTP client shared by all feeds, pooling keep-alive connections per host"""
+    
+    REDIRECT_CODES = (301, 302, 303, 307, 308)
+    
+    def __init__(self, max_idle_per_host: int = 4, max_redirects: int = 5):
+        self.max_idle_per_host = max_idle_per_host
+        self.max_redirects = max_redirects
+        # Single SSL context that's lenient with certificates, reused for every connection
+        self.ssl_context = ssl.create_default_context()
+        self.ssl_context.check_hostname = False
+        self.ssl_context.verify_mode = ssl.CERT_NONE
+        self._idle: Dict[Tuple[str, str, int], List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+    
+    def _acquire(self, key: Tuple[str, str, int], timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        """Get an idle pooled connection for the host or open a new one"""
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                connection = idle.pop()
+                connection.timeout = timeout
+                if connection.sock is not None:
+                    connection.sock.settimeout(timeout)
+                return connection, True
+        return self._connect(key, timeout), False
+    
+    def _connect(self, key: Tuple[str, str, int], timeout: float) -> http.client.HTTPConnection:
+        """Open a new connection to the host"""
+        scheme, host, port = key
+        if scheme == 'https':
+            return http.client.HTTPSConnection(host, port, timeout=timeout, context=self.ssl_context)
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+    
+    def _release(self, key: Tuple[str, str, int], connection: http.client.HTTPConnection):
+        """Return a connection to the pool"""
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(connection)
+                return
+        connection.close()
+    
+    def close(self):
+        """Close all idle connections"""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+    
+    def request(self, url: str, headers: Optional[Dict[str, str]] = None,
+                method: str = 'GET', timeout: float = 30) -> TransportResponse:
+        """Send a request, following redirects, and return the open response"""
+        for _ in range(self.max_redirects + 1):
+            parts = urllib.parse.urlsplit(url)
+            scheme = parts.scheme.lower()
+            if scheme not in ('http', 'https'):
+                raise ValueError(f"Unsupported URL scheme: {url}")
+            port = parts.port or (443 if scheme == 'https' else 80)
+            key = (scheme, parts.hostname, port)
+            path = parts.path or '/'
+            if parts.query:
+                path += '?' + parts.query
+            
+            connection, reused = self._acquire(key, timeout)
+            try:
+                connection.request(method, path, headers=headers or {})
+                response = connection.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                connection.close()
+                if not reused:
+                    raise
+                # The server dropped an idle keep-alive connection; retry on a fresh one
+                connection = self._connect(key, timeout)
+                try:
+                    connection.request(method, path, headers=headers or {})
+                    response = connection.getresponse()
+                except Exception:
+                    connection.close()
+                    raise
+            except Exception:
+                connection.close()
+                raise
+            
+            result = TransportResponse(self, key, connection, response, url)
+            location = response.getheader('Location')
+            if response.status in self.REDIRECT_CODES and location:
+                result.read()
+                result.close()
+                url = urllib.parse.urljoin(url, location)
+                continue
+            return result
+        
+        raise http.client.HTTPException(f"Too many redirects fetching {url}")
+
+_default_transport = None
+_default_transport_lock = threading.Lock()
+
+def get_default_transport() -> HTTPTransport:
+    """Transport shared by every FuelPriceAPI unless one is given explicitly"""
+    global _default_transport
+    with _default_transport_lock:
+        if _default_transport is None:
+            _default_transport = HTTPTransport()
+        return _default_transport
+
+class FeedError(Exception):
+    """Raised when a feed cannot be downloaded"""
+
+class FeedTimeout(FeedError):
+    """Raised when a feed is still downloading at its deadline"""
+
+class _JSONStream:
+    """Incremental JSON tokenizer over an iterator of UTF-8 byte chunks"""
+    
+    WHITESPACE = ' \t\r\n'
+    # What may still follow a decoded number if it runs up to the end of the buffer
+    NUMBER_TAIL = re.compile(r'[0-9+\-.eE]*\Z')
+    
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json_decoder = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+    
+    def _fill(self) -> bool:
+        """Append the next piece of text to the buffer, False once input is exhausted"""
+        if self.eof:
+            return False
+        text = ''
+        while not text:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                text = self._text_decoder.decode(b'', final=True)
+                self.eof = True
+                break
+            text = self._text_decoder.decode(chunk)
+        # Drop consumed text so the buffer only ever holds the value being decoded
+        self.buf = self.buf[self.pos:] + text
+        self.pos = 0
+        return bool(text)
+    
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, '' at end of input"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in self.WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill() and self.eof:
+                return ''
+    
+    def expect(self, chars: str) -> str:
+        """Consume the next character, which must be one of chars"""
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Expected one of {chars!r} in JSON stream, found {char!r}")
+        self.pos += 1
+        return char
+    
+    def value(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._json_decoder.raw_decode(self.buf, self.pos)
+                # A number cut at the buffer end (e.g. "1." or "1e") may continue in the next chunk
+                cut = (isinstance(value, (int, float)) and not isinstance(value, bool)
+                       and self.NUMBER_TAIL.match(self.buf, end))
+                if not cut or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+def iter_json_array(chunks: Iterable[bytes], key: str) -> Iterator:
+    """Yield the items of the array stored under key in a top-level JSON object
+    
+    Items are decoded one at a time as the chunks arrive; other top-level
+    values are decoded and discarded.
+    """
+    stream = _JSONStream(chunks)
+    stream.expect('{')
+    if stream.peek() == '}':
+        return
+    while True:
+        name = stream.value()
+        stream.expect(':')
+        if name == key and stream.peek() == '[':
+            stream.expect('[')
+            if stream.peek() == ']':
+                return
+            while True:
+                yield stream.value()
+                if stream.expect(',]') == ']':
+                    return
+        stream.value()
+        if stream.expect(',}') == '}':
+            return
+
+def iter_response_chunks(response, chunk_size: int = 65536) -> Iterator[bytes]:
+    """Yield the decompressed body of an HTTP response chunk by chunk
+    
+    Each chunk is what one socket read returned, so a slowly trickling body
+    still yields regularly and deadlines can be checked between chunks.
+    """
+    encoding = (response.getheader('Content-Encoding') or '').lower()
+    decompressor = None
+    first = True
+    read = getattr(response, 'read1', response.read)
+    while True:
+        chunk = read(chunk_size)
+        if not chunk:
+            break
+        if first:
+            first = False
+            # Handle gzip/deflate, and detect gzip even if header missing
+            if encoding in ('gzip', 'x-gzip', 'deflate') or chunk[:2] == b'\x1f\x8b':
+                decompressor = zlib.decompressobj(zlib.MAX_WBITS | 32)
+        if decompressor:
+            chunk = decompressor.decompress(chunk)
+        if chunk:
+            yield chunk
+    if decompressor:
+        tail = decompressor.flush()
+        if tail:
+            yield tail
+
+def iter_file_chunks(path: str, chunk_size: int = 65536) -> Iterator[bytes]:
+    """Yield a file's contents chunk by chunk"""
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
 class FuelPriceAPI:
     """Base class for fuel price API implementations"""
     
-    def __init__(self, name: str, url: str):
+    stations_key = 'stations'
+    
+    def __init__(self, name: str, url: str, timeout: float = 30, cache_dir: Optional[str] = None,
+                 transport: Optional[HTTPTransport] = None):
         self.name = name
         self.url = url
+        self.timeout = timeout
+        self.transport = transport or get_default_transport()
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
             'Accept': 'application/json, text/plain, */*',
             'Accept-Language': 'en-GB,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
+            'Accept-Encoding': 'gzip, deflate',
             'Connection': 'keep-alive'
         }
+        # Last feed body is kept on disk so unchanged feeds can be revalidated cheaply
+        if cache_dir is None:
+            cache_dir = os.getenv('FUEL_FEED_CACHE_DIR', DEFAULT_FEED_CACHE_DIR)
+        self.cache_dir = cache_dir or None
+        self._cached_store = None
+        self._cached_validators = None
+        self._stream_validators = None
     
-    def fetch_data(self) -> Optional[Dict]:
-        """Fetch raw data from the API"""
-        try:
-            print(f"Fetching {self.name} fuel data...")
-            
-            # Create request with headers
-            req = urllib.request.Request(self.url, headers=self.headers)
-            
-            # Create SSL context that's more lenient with certificates
-            ssl_context = ssl.create_default_context()
-            ssl_context.check_hostname = False
-            ssl_context.verify_mode = ssl.CERT_NONE
-            
-            with urllib.request.urlopen(req, timeout=30, context=ssl_context) as response:
-                if response.getcode() == 200:
-                    data = response.read()
-                    
-                    # Handle gzip compressed responses
-                    if response.getheader('Content-Encoding') == 'gzip':
-                        data = gzip.decompress(data)
-                    
-                    # Try to detect gzip even if header missing
-                    elif data[:2] == b'\x1f\x8b':
-                        try:
-                            data = gzip.decompress(data)
-                        except:
-                            pass  # If decompression fails, use original data
-                    
-                    text_data = data.decode('utf-8')
-                    return json.loads(text_data)
-                else:
-                    print(f"HTTP {response.getcode()} error fetching {self.name} data")
-                    return None
-                    
-        except urllib.error.HTTPError as e:
-            print(f"HTTP Error fetching {self.name} data: {e.code} {e.reason}")
+    @property
+    def cache_path(self) -> Optional[str]:
+        """Base path of this feed's cache files"""
+        if not self.cache_dir:
             return None
-        except urllib.error.URLError as e:
-            print(f"URL Error fetching {self.name} data: {e.reason}")
+        slug = re.sub(r'[^a-z0-9]+', '_', self.name.lower()).strip('_')
+        return os.path.join(self.cache_dir, slug)
+    
+    def _load_cache_meta(self) -> Optional[Dict]:
+        """Load validators (ETag/Last-Modified) of the cached body"""
+        if not self.cache_path:
             return None
-        except json.JSONDecodeError as e:
-            print(f"Error parsing {self.name} JSON: {e}")
+        try:
+            with open(self.cache_path + '.meta.json', 'r') as f:
+                meta = json.load(f)
+            if meta.get('url') == self.url and os.path.exists(self.cache_path + '.json'):
+                return meta
+        except (OSError, ValueError, AttributeError):
+            pass
+        return None
+    
+    def _open_cache_writer(self) -> Optional[Tuple[str, object]]:
+        """Open a temporary file to receive a new body, None if caching is off"""
+        if not self.cache_path:
+            return None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{self.cache_path}.json.{os.getpid()}.{threading.get_ident()}.tmp"
+            return tmp_path, open(tmp_path, 'wb')
+        except OSError as e:
+            print(f"Warning: Could not cache {self.name} data: {e}")
             return None
+    
+    def _commit_cache(self, tmp_path: str, meta: Dict):
+        """Move a completely received body into place along with its validators"""
+        try:
+            os.replace(tmp_path, self.cache_path + '.json')
+            meta_tmp = f"{self.cache_path}.meta.json.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(meta_tmp, 'w') as f:
+                json.dump(meta, f)
+            os.replace(meta_tmp, self.cache_path + '.meta.json')
+        except OSError as e:
+            print(f"Warning: Could not cache {self.name} data: {e}")
+    
+    def _request_headers(self, meta: Optional[Dict]) -> Dict[str, str]:
+        """Request headers, made conditional when a cached body exists"""
+        headers = dict(self.headers)
+        if meta:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+    
+    def iter_stations(self, deadline: Optional[float] = None) -> Iterator[FuelStation]:
+        """Stream stations from the feed one at a time
+        
+        The body is decompressed and decoded incrementally, so only a single
+        station record is in memory at once. A 304 response replays the
+        on-disk copy. Raises on network, HTTP or parse errors, and FeedTimeout
+        if the download is still running at deadline (a time.monotonic() value).
+        """
+        self._stream_validators = None
+        meta = self._load_cache_meta()
+        print(f"Fetching {self.name} fuel data...")
+        
+        timeout = self.timeout
+        if deadline is not None:
+            timeout = min(timeout, max(0.01, deadline - time.monotonic()))
+        with self.transport.request(self.url, headers=self._request_headers(meta),
+                                    timeout=timeout) as response:
+            if response.getcode() == 304 and meta:
+                response.read()
+                print(f"{self.name} data not modified, using cached copy")
+                if self._cached_store is not None and self._cached_validators == meta:
+                    yield from self._cached_store.iter_stations()
+                else:
+                    yield from self._parse_records(iter_file_chunks(self.cache_path + '.json'))
+                self._stream_validators = meta
+                return
+            
+            if response.getcode() != 200:
+                response.read()
+                raise FeedError(f"{response.getcode()} {response.reason}")
+            
+            writer = self._open_cache_writer()
+            chunks = iter_response_chunks(response)
+            if deadline is not None:
+                chunks = self._until(chunks, response, deadline)
+            if writer:
+                chunks = self._tee(chunks, writer[1])
+            try:
+                yield from self._parse_records(chunks)
+                # Drain anything after the stations array so the cached body is complete
+                for _ in chunks:
+                    pass
+                if writer:
+                    writer[1].close()
+                    new_meta = {
+                        'url': self.url,
+                        'etag': response.getheader('ETag'),
+                        'last_modified': response.getheader('Last-Modified'),
+                        'fetched': time.time()
+                    }
+                    self._commit_cache(writer[0], new_meta)
+                    self._stream_validators = new_meta
+            finally:
+                if writer and not writer[1].closed:
+                    writer[1].close()
+                    try:
+                        os.unlink(writer[0])
+                    except OSError:
+                        pass
+    
+    @staticmethod
+    def _until(chunks: Iterator[bytes], response: TransportResponse, deadline: float) -> Iterator[bytes]:
+        """Pass chunks through, raising FeedTimeout once the deadline passes
+        
+        The socket timeout is cut to the time left, so a read cannot block
+        past the deadline either; leaving early closes the response.
+        """
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise FeedTimeout("fetch deadline passed")
+            response.settimeout(remaining)
+            try:
+                chunk = next(chunks)
+            except TimeoutError:
+                raise FeedTimeout("fetch deadline passed")
+            except StopIteration:
+                return
+            yield chunk
+    
+    @staticmethod
+    def _tee(chunks: Iterator[bytes], sink) -> Iterator[bytes]:
+        """Pass chunks through while copying them to sink"""
+        for chunk in chunks:
+            sink.write(chunk)
+            yield chunk
+    
+    def _parse_records(self, chunks: Iterable[bytes]) -> Iterator[FuelStation]:
+        """Turn streamed station records into FuelStation objects"""
+        for station_data in iter_json_array(chunks, self.stations_key):
+            station = self.parse_record(station_data)
+            if station is not None:
+                yield station
+    
+    def load_store(self, deadline: Optional[float] = None) -> Optional['StationStore']:
+        """Fetch and parse every station into a columnar store, None if the feed failed or missed deadline"""
+        try:
+            store = StationStore()
+            store.add_feed(self.name, self.iter_stations(deadline))
+            # Keep the parsed result so a later 304 needs no parsing at all
+            if self._stream_validators:
+                self._cached_store = store
+                self._cached_validators = self._stream_validators
+            return store
+        except FeedTimeout as e:
+            print(f"Timed out fetching {self.name} data: {e}")
+        except FeedError as e:
+            print(f"HTTP Error fetching {self.name} data: {e}")
+        except http.client.HTTPException as e:
+            print(f"HTTP Error fetching {self.name} data: {e}")
+        except OSError as e:
+            print(f"Connection error fetching {self.name} data: {e}")
         except UnicodeDecodeError as e:
             print(f"Encoding error fetching {self.name} data: {e}")
-            return None
+        except (ValueError, zlib.error) as e:
+            print(f"Error parsing {self.name} JSON: {e}")
         except Exception as e:
             print(f"Unexpected error fetching {self.name} data: {e}")
+        return None
+    
+    def load_stations(self) -> Optional[List[FuelStation]]:
+        """Fetch and parse every station, returning None if the feed failed"""
+        store = self.load_store()
+        return list(store.iter_stations()) if store is not None else None
+    
+    def fetch_data(self) -> Optional[Dict]:
+        """Fetch the whole feed document (use iter_stations for station data)"""
+        try:
+            print(f"Fetching {self.name} fuel data...")
+            with self.transport.request(self.url, headers=self.headers, timeout=self.timeout) as response:
+                if response.getcode() != 200:
+                    response.read()
+                    print(f"HTTP Error fetching {self.name} data: {response.getcode()} {response.reason}")
+                    return None
+                return json.loads(b''.join(iter_response_chunks(response)).decode('utf-8'))
+        except (http.client.HTTPException, OSError, ValueError, zlib.error) as e:
+            print(f"Error fetching {self.name} data: {e}")
             return None
     
-    def parse_stations(self, data: Dict) -> List[FuelStation]:
-        """Parse stations from API data - override in subclasses"""
+    def parse_station(self, station_data: Dict) -> Optional[FuelStation]:
+        """Parse a single station record - override in subclasses"""
         raise NotImplementedError
-
-class AsdaAPI(FuelPriceAPI):
-    """ASDA fuel price API implementation"""
     
-    def __init__(self):
-        super().__init__("ASDA", "https://storelocator.asda.com/fuel_prices_data.json")
+    def parse_record(self, station_data: Dict) -> Optional[FuelStation]:
+        """Parse a station record and normalize its fuel codes and price units"""
+        station = self.parse_station(station_data)
+        if station is not None:
+            station.prices = normalize_prices(station.prices)
+        return station
     
     def parse_stations(self, data: Dict) -> List[FuelStation]:
+        """Parse stations from a whole feed document"""
         stations = []
-        if 'stations' in data:
-            for station_data in data['stations']:
-                try:
-                    station = FuelStation(
-                        site_id=str(station_data.get('site_id', '')),
-                        brand='ASDA',
-                        name=station_data.get('name', ''),
-                        postcode=station_data.get('postcode', ''),
-                        address=station_data.get('address', ''),
-                        prices=station_data.get('prices', {})
-                    )
-                    stations.append(station)
-                except (KeyError, TypeError) as e:
-                    print(f"Error parsing ASDA station: {e}")
-                    continue
+        for station_data in data.get(self.stations_key, []):
+            station = self.parse_record(station_data)
+            if station is not None:
+                stations.append(station)
         return stations
 
-class SainsburysAPI(FuelPriceAPI):
-    """Sainsbury's fuel price API implementation"""
+def field_getter(path: str):
+    """Compile a dotted field path into a function reading it from a record"""
+    keys = tuple(path.split('.'))
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda record: record.get(key)
     
-    def __init__(self):
-        super().__init__("Sainsbury's", "https://api.sainsburys.co.uk/v1/exports/latest/fuel_prices_data.json")
-    
-    def parse_stations(self, data: Dict) -> List[FuelStation]:
-        stations = []
-        if 'stations' in data:
-            for station_data in data['stations']:
-                try:
-                    station = FuelStation(
-                        site_id=str(station_data.get('site_id', '')),
-                        brand='Sainsburys',
-                        name=station_data.get('name', ''),
-                        postcode=station_data.get('postcode', ''),
-                        address=station_data.get('address', ''),
-                        prices=station_data.get('prices', {})
-                    )
-                    stations.append(station)
-                except (KeyError, TypeError) as e:
-                    print(f"Error parsing Sainsburys station: {e}")
-                    continue
-        return stations
+    def get(record):
+        for key in keys:
+            if not isinstance(record, dict):
+                return None
+            record = record.get(key)
+        return record
+    return get
+
+def to_coordinate(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+@dataclass(frozen=True)
+class FeedSchema:
+    """Where one retailer feed keeps each station field
 
-class TescoAPI(FuelPriceAPI):
-    """Tesco fuel price API implementation"""
+    Paths are dotted keys into a station record. A fixed brand overrides
+    the record's own brand field.
+    """
+    name: str
+    url: str
+    brand: Optional[str] = None
+    stations_key: str = 'stations'
+    site_id: str = 'site_id'
+    station_name: str = 'name'
+    brand_field: str = 'brand'
+    address: str = 'address'
+    postcode: str = 'postcode'
+    prices: str = 'prices'
+    latitude: str = 'location.latitude'
+    longitude: str = 'location.longitude'
+
+# Retail fuel feeds from fuel_apis.md, in reporting order
+FEED_SCHEMAS: List[FeedSchema] = [
+    FeedSchema("ASDA", "https://storelocator.asda.com/fuel_prices_data.json", brand="ASDA"),
+    FeedSchema("Sainsbury's", "https://api.sainsburys.co.uk/v1/exports/latest/fuel_prices_data.json", brand="Sainsburys"),
+    FeedSchema("Tesco", "https://www.tesco.com/fuel_prices/fuel_prices_data.json", brand="Tesco"),
+    FeedSchema("Morrisons", "https://www.morrisons.com/fuel-prices/fuel.json", brand="Morrisons"),
+    FeedSchema("BP", "https://www.bp.com/en_gb/united-kingdom/home/fuelprices/fuel_prices_data.json"),
+    FeedSchema("Esso", "https://fuelprices.esso.co.uk/latestdata.json"),
+    FeedSchema("JET", "https://jetlocal.co.uk/fuel_prices_data.json"),
+    FeedSchema("MFG", "https://fuel.motorfuelgroup.com/fuel_prices_data.json"),
+    FeedSchema("Rontec", "https://www.rontec-servicestations.co.uk/fuel-prices/data/fuel_prices_data.json"),
+    FeedSchema("SGN", "https://www.sgnretail.uk/files/data/SGN_daily_fuel_prices.json"),
+    FeedSchema("Moto", "https://moto-way.com/fuel-price/fuel_prices.json"),
+    FeedSchema("Ascona", "https://fuelprices.asconagroup.co.uk/newfuel.json"),
+    FeedSchema("KRL", "https://api.krl.live/integration/live_price/krl"),
+]
+
+class FeedAPI(FuelPriceAPI):
+    """Fuel price API driven by a FeedSchema"""
     
-    def __init__(self):
-        super().__init__("Tesco", "https://www.tesco.com/fuel_prices/fuel_prices_data.json")
+    def __init__(self, schema: FeedSchema, **kwargs):
+        super().__init__(schema.name, schema.url, **kwargs)
+        self.schema = schema
+        self.stations_key = schema.stations_key
+        # Resolve field paths once rather than per record
+        self._site_id = field_getter(schema.site_id)
+        self._name = field_getter(schema.station_name)
+        self._brand = field_getter(schema.brand_field)
+        self._address = field_getter(schema.address)
+        self._postcode = field_getter(schema.postcode)
+        self._prices = field_getter(schema.prices)
+        self._latitude = field_getter(schema.latitude)
+        self._longitude = field_getter(schema.longitude)
     
-    def parse_stations(self, data: Dict) -> List[FuelStation]:
-        stations = []
-        if 'stations' in data:
-            for station_data in data['stations']:
-                try:
-                    station = FuelStation(
-                        site_id=str(station_data.get('site_id', '')),
-                        brand='Tesco',
-                        name=station_data.get('name', ''),
-                        postcode=station_data.get('postcode', ''),
-                        address=station_data.get('address', ''),
-                        prices=station_data.get('prices', {})
-                    )
-                    stations.append(station)
-                except (KeyError, TypeError) as e:
-                    print(f"Error parsing Tesco station: {e}")
-                    continue
-        return stations
+    def parse_station(self, station_data: Dict) -> Optional[FuelStation]:
+        try:
+            latitude = to_coordinate(self._latitude(station_data))
+            longitude = to_coordinate(self._longitude(station_data))
+            if latitude is None or longitude is None:
+                latitude = longitude = None
+            site_id = self._site_id(station_data)
+            return FuelStation(
+                site_id=str(site_id) if site_id is not None else '',
+                brand=self.schema.brand or str(self._brand(station_data) or ''),
+                name=self._name(station_data) or '',
+                postcode=self._postcode(station_data) or '',
+                address=self._address(station_data) or '',
+                prices=self._prices(station_data) or {},
+                latitude=latitude,
+                longitude=longitude
+            )
+        except (KeyError, TypeError, AttributeError) as e:
+            print(f"Error parsing {self.name} station: {e}")
+            return None
+
+def create_feed_apis(names: Optional[Iterable[str]] = None, **kwargs) -> List[FeedAPI]:
+    """FeedAPI instances for the named feeds (case-insensitive), or every known feed"""
+    if names is None:
+        return [FeedAPI(schema, **kwargs) for schema in FEED_SCHEMAS]
+    by_name = {schema.name.upper(): schema for schema in FEED_SCHEMAS}
+    apis = []
+    for name in names:
+        schema = by_name.get(name.strip().upper())
+        if schema is None:
+            print(f"Unknown fuel feed: {name}", file=sys.stderr)
+        else:
+            apis.append(FeedAPI(schema, **kwargs))
+    return apis
 
 class PostcodeUtils:
     """Utilities for working with UK postcodes"""
@@ -201,9 +787,14 @@ class PostcodeUtils:
         """Parse a UK postcode into components"""
         normalized = PostcodeUtils.normalize_postcode(postcode)
         
-        # Extract outcode (first part before the number)
-        outcode_match = re.match(r'^([A-Z]{1,2}[0-9]{1,2}[A-Z]?)', normalized)
-        outcode = outcode_match.group(1) if outcode_match else ''
+        # A full postcode ends in a 3-character incode (digit, two letters); the rest is the outcode
+        full_match = re.match(r'^([A-Z]{1,2}[0-9][A-Z0-9]?)[0-9][A-Z]{2}$', normalized)
+        if full_match:
+            outcode = full_match.group(1)
+        else:
+            # Partial postcode such as "BT8" or "SW1A"
+            outcode_match = re.match(r'^([A-Z]{1,2}[0-9]{1,2}[A-Z]?)', normalized)
+            outcode = outcode_match.group(1) if outcode_match else ''
         
         # Extract area (first 1-2 letters)
         area_match = re.match(r'^([A-Z]{1,2})', normalized)
@@ -215,73 +806,733 @@ class PostcodeUtils:
             area=area
         )
 
+class StationSequence(Sequence):
+    """Read-only list-like view of one feed's rows in a StationStore
+    
+    FuelStation objects are built on access and not retained.
+    """
+    
+    def __init__(self, store: 'StationStore', rows: range):
+        self.store = store
+        self.rows = rows
+    
+    def __len__(self) -> int:
+        return len(self.rows)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.store.station(row) for row in self.rows[index]]
+        return self.store.station(self.rows[index])
+    
+    def __iter__(self) -> Iterator[FuelStation]:
+        for row in self.rows:
+            yield self.store.station(row)
+
+class StationStore:
+    """Columnar storage of stations from every feed
+    
+    Each attribute is a column indexed by row. Brands and postcodes are
+    interned to integer codes, coordinates and prices are float arrays with
+    NaN for missing values, and each feed occupies a contiguous row range.
+    """
+    
+    def __init__(self):
+        self.feed_ranges: Dict[str, range] = {}
+        self.site_ids: List[str] = []
+        self.names: List[str] = []
+        self.addresses: List[str] = []
+        self.brands: List[str] = []
+        self.brand_codes = array('H')
+        self.postcodes: List[str] = []
+        self.postcode_codes = array('I')
+        self.latitudes = array('d')
+        self.longitudes = array('d')
+        self.prices: Dict[FuelType, array] = {}
+        self._brand_lookup: Dict[str, int] = {}
+        self._postcode_lookup: Dict[str, int] = {}
+    
+    def __len__(self) -> int:
+        return len(self.site_ids)
+    
+    @property
+    def feeds(self) -> List[str]:
+        return list(self.feed_ranges.keys())
+    
+    @staticmethod
+    def _intern(value: str, table: List[str], lookup: Dict[str, int]) -> int:
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(table)
+            table.append(value)
+        return code
+    
+    @staticmethod
+    def _to_float(value) -> float:
+        try:
+            return float(value) if value is not None else NAN
+        except (TypeError, ValueError):
+            return NAN
+    
+    def append(self, station: FuelStation):
+        """Add a station as a new row"""
+        row = len(self.site_ids)
+        self.site_ids.append(sys.intern(station.site_id or ''))
+        self.names.append(station.name or '')
+        self.addresses.append(station.address or '')
+        self.brand_codes.append(self._intern(station.brand or '', self.brands, self._brand_lookup))
+        self.postcode_codes.append(self._intern(station.postcode or '', self.postcodes, self._postcode_lookup))
+        self.latitudes.append(self._to_float(station.latitude))
+        self.longitudes.append(self._to_float(station.longitude))
+        
+        prices = station.prices or {}
+        for fuel in prices:
+            if fuel not in self.prices:
+                self.prices[fuel] = array('d', [NAN]) * row
+        for fuel, column in self.prices.items():
+            column.append(self._to_float(prices.get(fuel)))
+    
+    def add_feed(self, feed: str, stations: Iterable[FuelStation]) -> range:
+        """Append a feed's stations as a contiguous block of rows"""
+        start = len(self)
+        for station in stations:
+            self.append(station)
+        self.feed_ranges[feed] = range(start, len(self))
+        return self.feed_ranges[feed]
+    
+    def feed_columns(self, feed: str) -> Dict[str, Any]:
+        """One feed's rows as JSON-ready columns, with None for missing numbers"""
+        rows = self.feed_ranges.get(feed, range(0))
+        start, stop = rows.start, rows.stop
+        
+        def floats(column: array) -> List[Optional[float]]:
+            return [value if value == value else None for value in column[start:stop]]
+        
+        return {
+            'site_ids': self.site_ids[start:stop],
+            'names': self.names[start:stop],
+            'addresses': self.addresses[start:stop],
+            'brands': [self.brands[code] for code in self.brand_codes[start:stop]],
+            'postcodes': [self.postcodes[code] for code in self.postcode_codes[start:stop]],
+            'latitudes': floats(self.latitudes),
+            'longitudes': floats(self.longitudes),
+            'prices': {fuel.value: floats(column) for fuel, column in self.prices.items()
+                       if any(value == value for value in column[start:stop])},
+        }
+    
+    def add_columns(self, feed: str, columns: Dict[str, Any]) -> range:
+        """Append a feed saved by feed_columns as a contiguous block of rows"""
+        start = len(self)
+        count = len(columns.get('site_ids') or [])
+        lists = ('site_ids', 'names', 'addresses', 'brands', 'postcodes', 'latitudes', 'longitudes')
+        if any(len(columns.get(key) or []) != count for key in lists) or any(
+                len(values) != count for values in (columns.get('prices') or {}).values()):
+            raise ValueError(f"Inconsistent saved columns for {feed}")
+        
+        self.site_ids.extend(sys.intern(site_id or '') for site_id in columns.get('site_ids') or [])
+        self.names.extend(name or '' for name in columns.get('names') or [])
+        self.addresses.extend(address or '' for address in columns.get('addresses') or [])
+        self.brand_codes.extend(self._intern(brand or '', self.brands, self._brand_lookup)
+                                for brand in columns.get('brands') or [])
+        self.postcode_codes.extend(self._intern(postcode or '', self.postcodes, self._postcode_lookup)
+                                   for postcode in columns.get('postcodes') or [])
+        self.latitudes.extend(map(self._to_float, columns.get('latitudes') or []))
+        self.longitudes.extend(map(self._to_float, columns.get('longitudes') or []))
+        for code, values in (columns.get('prices') or {}).items():
+            fuel = FuelType.parse(code)
+            if fuel is None:
+                continue
+            if fuel not in self.prices:
+                self.prices[fuel] = array('d', [NAN]) * start
+            self.prices[fuel].extend(map(self._to_float, values))
+        # Fuels this feed does not sell stay NaN for its rows
+        for column in self.prices.values():
+            if len(column) < start + count:
+                column.extend(array('d', [NAN]) * (start + count - len(column)))
+        self.feed_ranges[feed] = range(start, len(self))
+        return self.feed_ranges[feed]
+    
+    @classmethod
+    def from_feed_columns(cls, feeds: Dict[str, Dict[str, Any]]) -> 'StationStore':
+        """Rebuild a store from {feed: feed_columns(feed)}, e.g. after a JSON round trip"""
+        store = cls()
+        for feed, columns in feeds.items():
+            store.add_columns(feed, columns)
+        return store
+    
+    def feed_stations(self, feed: str) -> StationSequence:
+        """View of one feed's stations"""
+        return StationSequence(self, self.feed_ranges.get(feed, range(0)))
+    
+    def iter_stations(self) -> Iterator[FuelStation]:
+        for row in range(len(self)):
+            yield self.station(row)
+    
+    def postcode(self, row: int) -> str:
+        return self.postcodes[self.postcode_codes[row]]
+    
+    def row_prices(self, row: int) -> Dict[FuelType, float]:
+        """Known prices of one row"""
+        prices = {}
+        for fuel, column in self.prices.items():
+            value = column[row]
+            if value == value:
+                prices[fuel] = value
+        return prices
+    
+    def fingerprints(self) -> Dict[Tuple[str, str], Tuple[int, int, Tuple]]:
+        """(feed, site_id) -> (row, price hash, location) for diffing snapshots"""
+        columns = list(self.prices.items())
+        prints = {}
+        for feed, rows in self.feed_ranges.items():
+            for row in rows:
+                prices = tuple((fuel, column[row]) for fuel, column in columns if column[row] == column[row])
+                latitude, longitude = self.latitudes[row], self.longitudes[row]
+                # NaN never compares equal, so missing coordinates become None
+                location = (self.postcode(row), latitude if latitude == latitude else None,
+                            longitude if longitude == longitude else None)
+                prints[(feed, self.site_ids[row])] = (row, hash(prices), location)
+        return prints
+    
+    def station(self, row: int) -> FuelStation:
+        """Materialize a row as a FuelStation"""
+        latitude = self.latitudes[row]
+        longitude = self.longitudes[row]
+        prices = self.row_prices(row)
+        return FuelStation(
+            site_id=self.site_ids[row],
+            brand=self.brands[self.brand_codes[row]],
+            name=self.names[row],
+            postcode=self.postcode(row),
+            address=self.addresses[row],
+            prices=prices,
+            latitude=None if latitude != latitude else latitude,
+            longitude=None if longitude != longitude else longitude
+        )
+    
+    def price_values(self, fuel: str, rows: Optional[Iterable[int]] = None) -> List[float]:
+        """Known prices (pence per litre) for a fuel type, optionally limited to some rows"""
+        column = self.prices.get(FuelType.parse(fuel))
+        if column is None:
+            return []
+        if rows is None:
+            return [value for value in column if value == value]
+        return [column[row] for row in rows if column[row] == column[row]]
+    
+    def price_stats(self, fuel: str, rows: Optional[Iterable[int]] = None,
+                    percentiles: Tuple[float, ...] = (25, 50, 75)) -> Dict[str, Optional[float]]:
+        """Count, min, mean, max and percentiles of a fuel type's prices"""
+        values = sorted(self.price_values(fuel, rows))
+        stats: Dict[str, Optional[float]] = {'count': len(values)}
+        if not values:
+            stats.update({'min': None, 'mean': None, 'max': None})
+            stats.update({f'p{q:g}': None for q in percentiles})
+            return stats
+        stats['min'] = values[0]
+        stats['mean'] = math.fsum(values) / len(values)
+        stats['max'] = values[-1]
+        for q in percentiles:
+            stats[f'p{q:g}'] = self._percentile(values, q)
+        return stats
+    
+    @staticmethod
+    def _percentile(sorted_values: List[float], q: float) -> float:
+        """Linearly interpolated percentile of already sorted values"""
+        position = (len(sorted_values) - 1) * q / 100
+        lower = math.floor(position)
+        upper = min(lower + 1, len(sorted_values) - 1)
+        return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+class PostcodeIndex:
+    """Postcode lookup over all stations, built once per feed refresh
+    
+    Stations are keyed by their full postcode, outcode and area, so each
+    match level is a single dictionary lookup. Each key keeps the first
+    row per feed in feed order.
+    """
+    
+    def __init__(self, store: StationStore):
+        self.store = store
+        self.feeds = store.feeds
+        self.exact: Dict[str, Dict[str, int]] = {}
+        self.outcodes: Dict[str, Dict[str, int]] = {}
+        self.areas: Dict[str, Dict[str, int]] = {}
+        
+        # Parse each distinct postcode once
+        parsed = [PostcodeUtils.parse_postcode(postcode) for postcode in store.postcodes]
+        for feed, rows in store.feed_ranges.items():
+            for row in rows:
+                info = parsed[store.postcode_codes[row]]
+                self.exact.setdefault(info.full_postcode, {}).setdefault(feed, row)
+                for key, level in ((info.outcode, self.outcodes), (info.area, self.areas)):
+                    if key:
+                        level.setdefault(key, {}).setdefault(feed, row)
+    
+    def find_rows(self, postcode_info: PostcodeInfo) -> Dict[str, int]:
+        """Best row per feed: exact postcode, then outcode, then area"""
+        exact = self.exact.get(postcode_info.full_postcode, {})
+        by_outcode = self.outcodes.get(postcode_info.outcode, {}) if postcode_info.outcode else {}
+        by_area = self.areas.get(postcode_info.area, {}) if postcode_info.area else {}
+        
+        best_rows = {}
+        for feed in self.feeds:
+            for candidates in (exact, by_outcode, by_area):
+                if feed in candidates:
+                    best_rows[feed] = candidates[feed]
+                    break
+        return best_rows
+    
+    def find(self, postcode_info: PostcodeInfo) -> Dict[str, FuelStation]:
+        """Best station per feed: exact postcode, then outcode, then area"""
+        return {feed: self.store.station(row) for feed, row in self.find_rows(postcode_info).items()}
+
+EARTH_RADIUS_KM = 6371.0
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+class PostcodeLocator:
+    """Resolves postcodes to approximate coordinates without any network access
+    
+    Centroids come from an optional offline CSV (postcode or outcode,
+    latitude, longitude - e.g. the ONS/Doogal outcode lists), falling back to
+    the mean position of feed stations sharing the postcode, outcode or area.
+    """
+    
+    def __init__(self, dataset_path: Optional[str] = None):
+        if dataset_path is None:
+            dataset_path = os.getenv('FUEL_POSTCODE_CENTROIDS', DEFAULT_CENTROIDS_FILE)
+        self.centroids: Dict[str, Tuple[float, float]] = {}
+        self.station_centroids: Dict[str, Tuple[float, float]] = {}
+        if dataset_path and os.path.exists(dataset_path):
+            self.load_dataset(dataset_path)
+    
+    def load_dataset(self, path: str):
+        """Load postcode centroids from a CSV file with a header row"""
+        try:
+            with open(path, 'r', newline='') as f:
+                reader = csv.DictReader(f)
+                columns = {name.lower().strip(): name for name in (reader.fieldnames or [])}
+                key_col = columns.get('postcode') or columns.get('outcode') or columns.get('pcd')
+                lat_col = columns.get('latitude') or columns.get('lat')
+                lon_col = columns.get('longitude') or columns.get('lon') or columns.get('lng')
+                if not (key_col and lat_col and lon_col):
+                    print(f"Warning: {path} needs postcode, latitude and longitude columns")
+                    return
+                for row in reader:
+                    try:
+                        key = PostcodeUtils.normalize_postcode(row[key_col])
+                        self.centroids[key] = (float(row[lat_col]), float(row[lon_col]))
+                    except (TypeError, ValueError):
+                        continue
+        except OSError as e:
+            print(f"Warning: Could not load postcode centroids from {path}: {e}")
+    
+    def add_stations(self, store: 'StationStore'):
+        """Derive fallback centroids from station coordinates"""
+        sums: Dict[str, List[float]] = {}
+        for row in range(len(store)):
+            latitude, longitude = store.latitudes[row], store.longitudes[row]
+            if latitude != latitude or longitude != longitude:
+                continue
+            info = PostcodeUtils.parse_postcode(store.postcode(row))
+            for key in {info.full_postcode, info.outcode, info.area}:
+                if key:
+                    total = sums.setdefault(key, [0.0, 0.0, 0])
+                    total[0] += latitude
+                    total[1] += longitude
+                    total[2] += 1
+        self.station_centroids = {
+            key: (lat / count, lon / count) for key, (lat, lon, count) in sums.items()
+        }
+    
+    def locate_with_precision(self, postcode_info: PostcodeInfo) -> Optional[Tuple[Tuple[float, float], str]]:
+        """Most precise known position for a postcode and its level ('postcode', 'outcode' or 'area')"""
+        full = postcode_info.full_postcode
+        # A partial query such as "BT8" is located at the level it names
+        levels = (('postcode', full if full not in (postcode_info.outcode, postcode_info.area) else ''),
+                  ('outcode', postcode_info.outcode), ('area', postcode_info.area))
+        for level, key in levels:
+            if key and key in self.centroids:
+                return self.centroids[key], level
+            if key and key in self.station_centroids:
+                return self.station_centroids[key], level
+        return None
+    
+    def locate(self, postcode_info: PostcodeInfo) -> Optional[Tuple[float, float]]:
+        """Most precise known position for a postcode, or None"""
+        located = self.locate_with_precision(postcode_info)
+        return located[0] if located else None
+    
+    def write_outcodes(self, path: str) -> int:
+        """Save the station-derived outcode centroids as a CSV load_dataset reads, returning the row count"""
+        outcodes = sorted(key for key in self.station_centroids
+                          if re.match(r'^[A-Z]{1,2}[0-9][A-Z0-9]?$', key))
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['outcode', 'latitude', 'longitude'])
+            for outcode in outcodes:
+                latitude, longitude = self.station_centroids[outcode]
+                writer.writerow([outcode, round(latitude, 5), round(longitude, 5)])
+        os.replace(tmp_path, path)
+        return len(outcodes)
+
+class SpatialIndex:
+    """Uniform lat/lon grid over station rows for nearest and radius queries"""
+    
+    def __init__(self, store: 'StationStore', rows: Optional[Iterable[int]] = None, cell_deg: float = 0.1):
+        self.store = store
+        self.cell_deg = cell_deg
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        for row in (range(len(store)) if rows is None else rows):
+            latitude, longitude = store.latitudes[row], store.longitudes[row]
+            if latitude == latitude and longitude == longitude:
+                self.cells.setdefault(self._cell(latitude, longitude), []).append(row)
+        if self.cells:
+            cell_rows = [cell[0] for cell in self.cells]
+            cell_cols = [cell[1] for cell in self.cells]
+            self.bounds = (min(cell_rows), max(cell_rows), min(cell_cols), max(cell_cols))
+        else:
+            self.bounds = None
+    
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg))
+    
+    def _ring(self, row: int, col: int, radius: int) -> Iterator[Tuple[int, int]]:
+        """Cells on the square ring at Chebyshev distance radius"""
+        if radius == 0:
+            yield row, col
+            return
+        for c in range(col - radius, col + radius + 1):
+            yield row - radius, c
+            yield row + radius, c
+        for r in range(row - radius + 1, row + radius):
+            yield r, col - radius
+            yield r, col + radius
+    
+    def nearest(self, lat: float, lon: float, k: int = 1, max_km: Optional[float] = None,
+                predicate=None) -> List[Tuple[float, int]]:
+        """Up to k (distance_km, row) pairs closest to a point"""
+        if not self.bounds or k <= 0:
+            return []
+        row, col = self._cell(lat, lon)
+        min_row, max_row, min_col, max_col = self.bounds
+        max_radius = max(abs(row - min_row), abs(row - max_row), abs(col - min_col), abs(col - max_col))
+        latitudes, longitudes = self.store.latitudes, self.store.longitudes
+        
+        found: List[Tuple[float, int]] = []
+        for radius in range(max_radius + 1):
+            # Anything on this ring is at least (radius - 1) cells away
+            edge_lat = min(89.0, abs(lat) + (radius + 1) * self.cell_deg)
+            cell_km = self.cell_deg * math.radians(1) * EARTH_RADIUS_KM * math.cos(math.radians(edge_lat))
+            lower_bound = max(0, radius - 1) * cell_km
+            if max_km is not None and lower_bound > max_km:
+                break
+            if len(found) >= k and found[k - 1][0] <= lower_bound:
+                break
+            
+            for cell in self._ring(row, col, radius):
+                for station_row in self.cells.get(cell, ()):
+                    if predicate is not None and not predicate(station_row):
+                        continue
+                    distance = haversine_km(lat, lon, latitudes[station_row], longitudes[station_row])
+                    if max_km is None or distance <= max_km:
+                        found.append((distance, station_row))
+            found.sort()
+            del found[k:]
+        
+        return found
+    
+    def within(self, lat: float, lon: float, radius_km: float, predicate=None) -> List[Tuple[float, int]]:
+        """All (distance_km, row) pairs within radius_km, nearest first"""
+        return self.nearest(lat, lon, k=sys.maxsize, max_km=radius_km, predicate=predicate)
+
+@dataclass
+class StationChanges:
+    """Difference between two station snapshots, keyed by (feed, site_id)
+    
+    Price changes map each changed fuel to (old, new) pence, with None for
+    a fuel that appeared or stopped being listed.
+    """
+    added: List[Tuple[str, str]] = field(default_factory=list)
+    removed: List[Tuple[str, str]] = field(default_factory=list)
+    moved: List[Tuple[str, str]] = field(default_factory=list)
+    prices: Dict[Tuple[str, str], Dict[FuelType, Tuple[Optional[float], Optional[float]]]] = field(default_factory=dict)
+    unchanged: int = 0
+    
+    @property
+    def layout_changed(self) -> bool:
+        """Whether stations appeared, disappeared or moved, invalidating location indexes"""
+        return bool(self.added or self.removed or self.moved)
+    
+    def __bool__(self) -> bool:
+        return self.layout_changed or bool(self.prices)
+    
+    def counts(self) -> Dict[str, int]:
+        return {'added': len(self.added), 'removed': len(self.removed), 'moved': len(self.moved),
+                'repriced': len(self.prices), 'unchanged': self.unchanged}
+    
+    @classmethod
+    def diff(cls, old: StationStore, old_prints: Dict, new: StationStore, new_prints: Dict) -> 'StationChanges':
+        """Compare fingerprinted snapshots, only materializing prices of stations whose hash differs"""
+        changes = cls()
+        for key, (row, price_hash, location) in new_prints.items():
+            previous = old_prints.get(key)
+            if previous is None:
+                changes.added.append(key)
+                continue
+            old_row, old_hash, old_location = previous
+            if location != old_location:
+                changes.moved.append(key)
+            if price_hash != old_hash:
+                before, after = old.row_prices(old_row), new.row_prices(row)
+                changes.prices[key] = {
+                    fuel: (before.get(fuel), after.get(fuel))
+                    for fuel in before.keys() | after.keys() if before.get(fuel) != after.get(fuel)
+                }
+            elif location == old_location:
+                changes.unchanged += 1
+        changes.removed = [key for key in old_prints if key not in new_prints]
+        return changes
+
 class FuelPriceAnalyzer:
     """Main analyzer class that coordinates fuel price fetching and analysis"""
     
-    def __init__(self):
-        self.apis = [
-            AsdaAPI(),
-            SainsburysAPI(),
-            TescoAPI()
-        ]
+    def __init__(self, max_workers: int = 8, fetch_deadline: float = 60, feeds: Optional[Iterable[str]] = None,
+                 max_distance_km: Optional[float] = None):
+        # Feeds can be narrowed with FUEL_FEEDS, e.g. "ASDA,Tesco"
+        if feeds is None and os.getenv('FUEL_FEEDS'):
+            feeds = os.environ['FUEL_FEEDS'].split(',')
+        self.apis = create_feed_apis(feeds)
+        # Furthest a feed's nearest station may be to still count as near the postcode
+        if max_distance_km is None:
+            try:
+                max_distance_km = float(os.getenv('FUEL_MAX_DISTANCE_KM', DEFAULT_MAX_DISTANCE_KM))
+            except ValueError:
+                max_distance_km = DEFAULT_MAX_DISTANCE_KM
+        self.max_distance_km = max_distance_km
         self.stations_cache = {}
+        self.store = StationStore()
+        # Bound on concurrent feed downloads and on the wall time of a full refresh
+        self.max_workers = max_workers
+        self.fetch_deadline = fetch_deadline
+        self._postcode_index = None
+        self._spatial_index = None
+        self._locator = None
+        self._fingerprints = {}
+        # What the last set_stations changed, for consumers that update incrementally
+        self.last_changes = StationChanges()
+    
+    def _fetch_api_stations(self, api: FuelPriceAPI, deadline: Optional[float] = None) -> Optional[StationStore]:
+        """Fetch and parse a single feed"""
+        return api.load_store(deadline)
     
-    def fetch_all_stations(self, use_cache: bool = True) -> Dict[str, List[FuelStation]]:
-        """Fetch stations from all APIs"""
+    def iter_fetch_stations(self) -> Iterator[Tuple[str, Optional[StationStore]]]:
+        """Fetch all feeds concurrently, yielding (name, feed store) as each completes
+        
+        Every download stops at the fetch deadline, so no worker outlives it
+        by more than a socket read. A failed or timed out feed yields None.
+        """
+        deadline = time.monotonic() + self.fetch_deadline
+        executor = ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(self.apis))))
+        futures = {executor.submit(self._fetch_api_stations, api, deadline): api for api in self.apis}
+        pending = set(futures)
+        try:
+            for future in as_completed(futures, timeout=self.fetch_deadline):
+                pending.discard(future)
+                api = futures[future]
+                try:
+                    yield api.name, future.result()
+                except Exception as e:
+                    print(f"Unexpected error loading {api.name} stations: {e}")
+                    yield api.name, None
+        except FuturesTimeoutError:
+            for future in pending:
+                print(f"Timed out fetching {futures[future].name} data")
+                yield futures[future].name, None
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def fetch_all_stations(self, use_cache: bool = True) -> Dict[str, StationSequence]:
+        """Fetch stations from all APIs
+        
+        Stations are held in the columnar self.store; the returned mapping
+        holds a list-like view per feed.
+        """
         if use_cache and self.stations_cache:
             return self.stations_cache
         
-        all_stations = {}
-        for api in self.apis:
-            data = api.fetch_data()
-            if data:
-                stations = api.parse_stations(data)
-                all_stations[api.name] = stations
-                print(f"✓ {api.name}: {len(stations)} stations loaded")
+        results = {}
+        for name, feed_store in self.iter_fetch_stations():
+            results[name] = feed_store
+            if feed_store is not None:
+                print(f"✓ {name}: {len(feed_store)} stations loaded")
             else:
-                all_stations[api.name] = []
-                print(f"✗ {api.name}: Failed to load stations")
+                print(f"✗ {name}: Failed to load stations")
+        
+        # Keep the configured feed order regardless of completion order
+        return self.set_stations({
+            api.name: results[api.name].iter_stations() if results.get(api.name) is not None else ()
+            for api in self.apis
+        })
+    
+    def set_stations(self, stations: Dict[str, Iterable[FuelStation]]) -> Dict[str, StationSequence]:
+        """Replace the current stations, e.g. with a previously saved dataset"""
+        store = StationStore()
+        for feed, feed_stations in stations.items():
+            store.add_feed(feed, feed_stations)
+        return self.set_store(store)
+    
+    def set_store(self, store: StationStore) -> Dict[str, StationSequence]:
+        """Replace the current stations with a filled store, e.g. one rebuilt from saved columns
+        
+        The new snapshot is diffed against the previous one into self.last_changes.
+        """
+        fingerprints = store.fingerprints()
+        changes = StationChanges.diff(self.store, self._fingerprints, store, fingerprints)
+        
+        # Price-only refreshes keep the location indexes when every station kept its row
+        same_rows = fingerprints.keys() == self._fingerprints.keys() and all(
+            self._fingerprints[key][0] == row for key, (row, _, _) in fingerprints.items())
+        if changes.layout_changed or not same_rows:
+            self._postcode_index = None
+            self._spatial_index = None
+        else:
+            if self._postcode_index is not None:
+                self._postcode_index.store = store
+            if self._spatial_index is not None:
+                combined, by_feed = self._spatial_index
+                for index in [combined] + list(by_feed.values()):
+                    index.store = store
         
-        self.stations_cache = all_stations
-        return all_stations
+        self.store = store
+        self._fingerprints = fingerprints
+        self.last_changes = changes
+        self.stations_cache = {feed: store.feed_stations(feed) for feed in store.feeds}
+        return self.stations_cache
+    
+    def get_postcode_index(self) -> PostcodeIndex:
+        """Postcode index for the current stations, rebuilt only after a refresh"""
+        self.fetch_all_stations()
+        if self._postcode_index is None:
+            self._postcode_index = PostcodeIndex(self.store)
+        return self._postcode_index
+    
+    def _get_spatial_index(self) -> Tuple[SpatialIndex, Dict[str, SpatialIndex], PostcodeLocator]:
+        """Spatial indexes (all feeds and per feed) and postcode locator for the current stations"""
+        self.fetch_all_stations()
+        if self._spatial_index is None:
+            locator = self._locator or PostcodeLocator()
+            locator.add_stations(self.store)
+            self._locator = locator
+            combined = SpatialIndex(self.store)
+            by_feed = {feed: SpatialIndex(self.store, rows) for feed, rows in self.store.feed_ranges.items()}
+            self._spatial_index = (combined, by_feed)
+        return self._spatial_index[0], self._spatial_index[1], self._locator
+    
+    def locate_postcode(self, target_postcode: str) -> Optional[Tuple[float, float]]:
+        """Approximate coordinates of a postcode, or None if unknown"""
+        _, _, locator = self._get_spatial_index()
+        return locator.locate(PostcodeUtils.parse_postcode(target_postcode))
+    
+    def _station_at(self, row: int, distance: float) -> FuelStation:
+        station = self.store.station(row)
+        station.distance_km = round(distance, 2)
+        return station
+    
+    def find_nearest_stations(self, target_postcode: str, k: int = 5, radius_km: Optional[float] = None,
+                              brand: Optional[str] = None) -> List[FuelStation]:
+        """Nearest stations to a postcode across all retailers, with distance_km set"""
+        combined, by_feed, locator = self._get_spatial_index()
+        position = locator.locate(PostcodeUtils.parse_postcode(target_postcode))
+        if position is None:
+            return []
+        
+        index = combined
+        if brand:
+            feeds = [name for name in by_feed if name.upper() == brand.upper()]
+            if not feeds:
+                return []
+            index = by_feed[feeds[0]]
+        
+        matches = index.nearest(position[0], position[1], k=k, max_km=radius_km)
+        return [self._station_at(row, distance) for distance, row in matches]
+    
+    def find_stations_within(self, target_postcode: str, radius_km: float) -> List[FuelStation]:
+        """All stations within radius_km of a postcode, nearest first"""
+        return self.find_nearest_stations(target_postcode, k=sys.maxsize, radius_km=radius_km)
     
     def find_stations_by_postcode(self, target_postcode: str) -> Dict[str, FuelStation]:
-        """Find the best station for each brand near the target postcode"""
+        """Find the best station for each brand near the target postcode
+        
+        When the postcode or its outcode can be located, each brand's nearest
+        station within max_distance_km is used. Otherwise, and for brands with
+        nothing that close, the postcode, outcode or area match is kept.
+        """
         postcode_info = PostcodeUtils.parse_postcode(target_postcode)
-        all_stations = self.fetch_all_stations()
+        best_stations = self.get_postcode_index().find(postcode_info)
         
-        best_stations = {}
+        _, by_feed, locator = self._get_spatial_index()
+        located = locator.locate_with_precision(postcode_info)
+        # An area centroid is too coarse to beat a postcode prefix match
+        if located is None or located[1] == 'area':
+            return best_stations
         
-        for brand, stations in all_stations.items():
-            selected_station = None
-            
-            # First try exact postcode match
-            for station in stations:
-                station_pc = PostcodeUtils.normalize_postcode(station.postcode)
-                if station_pc == postcode_info.full_postcode:
-                    selected_station = station
-                    break
-            
-            # Then try outcode match
-            if not selected_station and postcode_info.outcode:
-                for station in stations:
-                    station_pc = PostcodeUtils.normalize_postcode(station.postcode)
-                    if station_pc.startswith(postcode_info.outcode):
-                        selected_station = station
-                        break
-            
-            # Finally try area match
-            if not selected_station and postcode_info.area:
-                for station in stations:
-                    station_pc = PostcodeUtils.normalize_postcode(station.postcode)
-                    if station_pc.startswith(postcode_info.area):
-                        selected_station = station
-                        break
-            
-            if selected_station:
-                best_stations[brand] = selected_station
+        position = located[0]
+        for brand, index in by_feed.items():
+            matches = index.nearest(position[0], position[1], k=1, max_km=self.max_distance_km)
+            if matches:
+                distance, row = matches[0]
+                best_stations[brand] = self._station_at(row, distance)
+        
+        # Keep the configured feed order
+        return {brand: best_stations[brand] for brand in by_feed if brand in best_stations}
+    
+    def get_price_statistics(self, fuel_type: str, brand: Optional[str] = None) -> Dict[str, Optional[float]]:
+        """Min/mean/max/percentiles of a fuel type's price (pence per litre) across all (or one retailer's) stations"""
+        self.fetch_all_stations()
+        rows = None
+        if brand:
+            feeds = [name for name in self.store.feed_ranges if name.upper() == brand.upper()]
+            rows = self.store.feed_ranges[feeds[0]] if feeds else range(0)
+        return self.store.price_stats(fuel_type, rows)
+    
+    def find_stations_for_postcodes(self, postcodes: List[str]) -> Dict[str, Dict[str, FuelStation]]:
+        """Find the best station per brand for each of several postcodes from one set of indexes"""
+        return {postcode: self.find_stations_by_postcode(postcode) for postcode in postcodes}
+    
+    def get_fuel_prices_summary(self, target_postcode: str, fuel=FuelType.B7) -> Dict[str, Dict]:
+        """Get a summary of one fuel type's prices for the target postcode"""
+        return self._fuel_summary(self.find_stations_by_postcode(target_postcode), fuel)
+    
+    def get_fuel_prices_summaries(self, postcodes: List[str], fuel=FuelType.B7) -> Dict[str, Dict[str, Dict]]:
+        """Get a summary of one fuel type's prices for each of several postcodes"""
+        return {
+            postcode: self._fuel_summary(stations, fuel)
+            for postcode, stations in self.find_stations_for_postcodes(postcodes).items()
+        }
+    
+    @staticmethod
+    def _fuel_summary(stations: Dict[str, FuelStation], fuel) -> Dict[str, Dict]:
+        fuel_type = FuelType.parse(fuel)
+        summary = {}
         
-        return best_stations
+        for brand, station in stations.items():
+            summary[brand] = {
+                'station_id': station.site_id,
+                'station_name': station.name,
+                'postcode': station.postcode,
+                'fuel': fuel_type.value if fuel_type else str(fuel),
+                'price_per_litre': station.get_price(fuel_type),
+                'distance_km': station.distance_km
+            }
+        
+        return summary
     
     def get_diesel_prices_summary(self, target_postcode: str) -> Dict[str, Dict]:
         """Get a summary of diesel prices for the target postcode"""
@@ -296,8 +1547,9 @@ class FuelPriceAnalyzer:
                 'postcode': station.postcode,
                 'diesel_price_per_litre': diesel_price,
                 'diesel_price_per_kwh': diesel_price / 10 if diesel_price else None,  # ~10 kWh per litre
-                'available_fuels': list(station.prices.keys()),
-                'all_prices': station.prices
+                'available_fuels': [fuel.value for fuel in station.prices],
+                'all_prices': {fuel.value: price for fuel, price in station.prices.items()},
+                'distance_km': station.distance_km
             }
         
         return summary
@@ -319,6 +1571,8 @@ class FuelPriceAnalyzer:
                 print(f"\n{brand}:")
                 print(f"  Station: {data['station_name']}")
                 print(f"  Postcode: {data['postcode']}")
+                if data['distance_km'] is not None:
+                    print(f"  Distance: {data['distance_km']:.1f} km")
                 print(f"  Diesel: £{diesel_price:.3f}/L (£{price_kwh:.4f}/kWh)")
                 print(f"  Available fuels: {', '.join(data['available_fuels'])}")
             else:
@@ -338,26 +1592,269 @@ class FuelPriceAnalyzer:
                 savings = most_expensive[1] - cheapest[1]
                 print(f"  Potential saving: £{savings:.3f}/L")
 
+class FuelPriceServer(http.server.ThreadingHTTPServer):
+    """HTTP API answering postcode queries from an in-memory dataset refreshed on a schedule"""
+    
+    daemon_threads = True
+    
+    def __init__(self, address: Tuple[str, int], analyzer: Optional[FuelPriceAnalyzer] = None,
+                 refresh_interval: float = 3600, history=None):
+        super().__init__(address, FuelRequestHandler)
+        self.analyzer = analyzer or FuelPriceAnalyzer()
+        # Optional fuel_price_history.PriceHistory recording each refresh's changes
+        self.history = history
+        self.refresh_interval = refresh_interval
+        self.last_refresh = None
+        # Queries and the dataset swap are serialized; fetching happens outside the lock
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresher = None
+    
+    def refresh(self):
+        """Fetch all feeds and swap in the new stations with their indexes prebuilt"""
+        analyzer = self.analyzer
+        results = dict(analyzer.iter_fetch_stations())
+        stations = {}
+        for api in analyzer.apis:
+            feed_store = results.get(api.name)
+            if feed_store is not None:
+                stations[api.name] = feed_store.iter_stations()
+            else:
+                # Keep serving the previous copy of a feed that failed this time
+                print(f"✗ {api.name}: Failed to load stations", file=sys.stderr)
+                stations[api.name] = list(analyzer.stations_cache.get(api.name, ()))
+        
+        with self.lock:
+            analyzer.set_stations(stations)
+            analyzer.get_postcode_index()
+            analyzer._get_spatial_index()
+            self.last_refresh = time.time()
+        changes = analyzer.last_changes.counts()
+        print(f"Loaded {len(analyzer.store)} stations from {len(analyzer.apis)} feeds "
+              f"({changes['added']} added, {changes['removed']} removed, {changes['repriced']} repriced)", file=sys.stderr)
+        
+        if self.history is not None:
+            fetched = {name: feed_store.iter_stations() for name, feed_store in results.items() if feed_store is not None}
+            try:
+                print(f"Recorded {self.history.record(fetched)} price changes", file=sys.stderr)
+            except Exception as e:
+                print(f"Could not record price history: {e}", file=sys.stderr)
+    
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Refresh failed: {e}", file=sys.stderr)
+    
+    def start_refresher(self):
+        """Load the dataset now, then keep refreshing it in a background thread"""
+        self.refresh()
+        self._refresher = threading.Thread(target=self._refresh_loop, name="fuel-refresh", daemon=True)
+        self._refresher.start()
+    
+    def server_close(self):
+        self._stop.set()
+        super().server_close()
+
+class FuelRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Routes GET requests to FuelPriceServer queries, answering with JSON"""
+    
+    routes = {
+        '/cheapest': 'cheapest',
+        '/nearest': 'nearest',
+        '/comparison': 'comparison',
+        '/stats': 'stats',
+        '/health': 'health',
+    }
+    
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        route = self.routes.get(url.path.rstrip('/') or '/')
+        if route is None:
+            self.send_json(404, {'error': 'not_found'})
+            return
+        
+        params = {key: values[-1] for key, values in urllib.parse.parse_qs(url.query).items()}
+        try:
+            with self.server.lock:
+                body = getattr(self, route)(params)
+        except ValueError as e:
+            self.send_json(400, {'error': str(e)})
+            return
+        except Exception as e:
+            print(f"Error handling {self.path}: {e}", file=sys.stderr)
+            self.send_json(500, {'error': 'internal_error'})
+            return
+        self.send_json(200, body)
+    
+    def send_json(self, status: int, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    @staticmethod
+    def _postcode(params: Dict[str, str]) -> str:
+        postcode = params.get('postcode', '').strip()
+        if not postcode:
+            raise ValueError("postcode is required")
+        return postcode
+    
+    @staticmethod
+    def _fuel(params: Dict[str, str]) -> FuelType:
+        fuel = FuelType.parse(params.get('fuel', 'B7'))
+        if fuel is None:
+            raise ValueError(f"unknown fuel type: {params['fuel']}")
+        return fuel
+    
+    def cheapest(self, params: Dict[str, str]) -> Dict:
+        postcode = self._postcode(params)
+        fuel = self._fuel(params)
+        summary = self.server.analyzer.get_fuel_prices_summary(postcode, fuel)
+        priced = [(brand, data) for brand, data in summary.items() if data['price_per_litre'] is not None]
+        result = {'postcode': postcode, 'fuel': fuel.value, 'brand': None, 'price_per_litre': None,
+                  'station_name': None, 'station_postcode': None, 'distance_km': None}
+        if priced:
+            brand, data = min(priced, key=lambda item: item[1]['price_per_litre'])
+            result.update(brand=brand, price_per_litre=data['price_per_litre'], station_name=data['station_name'],
+                          station_postcode=data['postcode'], distance_km=data['distance_km'])
+        return result
+    
+    def nearest(self, params: Dict[str, str]) -> Dict:
+        postcode = self._postcode(params)
+        try:
+            k = int(params.get('k', 5))
+            radius = float(params['radius']) if 'radius' in params else None
+        except ValueError:
+            raise ValueError("k must be an integer and radius a number")
+        stations = self.server.analyzer.find_nearest_stations(postcode, k=k, radius_km=radius,
+                                                              brand=params.get('brand'))
+        return {'postcode': postcode, 'stations': [asdict(station) for station in stations]}
+    
+    def comparison(self, params: Dict[str, str]) -> Dict:
+        postcode = self._postcode(params)
+        fuel = self._fuel(params)
+        return {'postcode': postcode, 'fuel': fuel.value,
+                'retailers': self.server.analyzer.get_fuel_prices_summary(postcode, fuel)}
+    
+    def stats(self, params: Dict[str, str]) -> Dict:
+        fuel = self._fuel(params)
+        brand = params.get('brand')
+        return {'fuel': fuel.value, 'brand': brand,
+                'pence_per_litre': self.server.analyzer.get_price_statistics(fuel.value, brand)}
+    
+    def health(self, params: Dict[str, str]) -> Dict:
+        last_refresh = self.server.last_refresh
+        return {
+            'stations': len(self.server.analyzer.store),
+            'feeds': {feed: len(rows) for feed, rows in self.server.analyzer.store.feed_ranges.items()},
+            'last_refresh': datetime.fromtimestamp(last_refresh).isoformat() if last_refresh else None,
+            'changes': self.server.analyzer.last_changes.counts(),
+        }
+
+def serve(argv: List[str]):
+    """Run the fuel price HTTP API until interrupted"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog="fuel_price_analyzer.py serve",
+                                     description="Serve fuel price queries over HTTP")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8099, help="Port to listen on (default 8099)")
+    parser.add_argument("--refresh", type=float, default=3600, metavar="SECONDS",
+                        help="Seconds between feed refreshes (default 3600)")
+    args = parser.parse_args(argv)
+    
+    from fuel_price_history import PriceHistory
+    server = FuelPriceServer((args.host, args.port), refresh_interval=args.refresh, history=PriceHistory.from_env())
+    server.start_refresher()
+    print(f"Serving fuel prices on http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
 def main():
     """Main function for command line usage"""
     import argparse
     
-    parser = argparse.ArgumentParser(description="Analyze fuel prices near a postcode")
-    parser.add_argument("postcode", help="UK postcode to search near")
+    if sys.argv[1:2] == ["serve"]:
+        serve(sys.argv[2:])
+        return
+    
+    if sys.argv[1:2] == ["centroids"]:
+        # Snapshot outcode positions from every feed's stations for offline use
+        path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_CENTROIDS_FILE
+        analyzer = FuelPriceAnalyzer()
+        analyzer.fetch_all_stations()
+        _, _, locator = analyzer._get_spatial_index()
+        print(f"Wrote {locator.write_outcodes(path)} outcode centroids to {path}")
+        return
+    
+    parser = argparse.ArgumentParser(description="Analyze fuel prices near a postcode",
+                                     epilog="Run 'fuel_price_analyzer.py serve --help' for the HTTP API, or "
+                                            "'fuel_price_analyzer.py centroids [path]' to save outcode centroids")
+    parser.add_argument("postcodes", nargs="*", metavar="postcode",
+                        help="UK postcode to search near; several give a JSON summary per postcode")
     parser.add_argument("--json", action="store_true", help="Output as JSON")
-    parser.add_argument("--brand", help="Filter to specific brand (ASDA, Sainsburys, Tesco)")
+    parser.add_argument("--brand", help="Filter to specific retailer feed (ASDA, Sainsbury's, Tesco, Morrisons, BP, ...)")
+    parser.add_argument("--nearest", type=int, metavar="K", help="List the K nearest stations across all retailers")
+    parser.add_argument("--radius", type=float, metavar="KM", help="Limit --nearest to stations within KM kilometres")
+    parser.add_argument("--fuel", help="With --json, --stats or several postcodes, report this fuel type instead of diesel (E10, E5, B7, SDV, ...)")
+    parser.add_argument("--stats", action="store_true",
+                        help="Print price statistics of --fuel (default diesel) across all stations, or --brand's")
+    parser.add_argument("--max-distance", type=float, metavar="KM",
+                        help=f"Furthest a retailer's station may be from the postcode (default {DEFAULT_MAX_DISTANCE_KM:g})")
     
     args = parser.parse_args()
+    if not args.postcodes and not args.stats:
+        parser.error("a postcode is required")
+    if len(args.postcodes) > 1 and (args.nearest or args.radius):
+        parser.error("--nearest and --radius take a single postcode")
+    if args.fuel and FuelType.parse(args.fuel) is None:
+        print(f"Unknown fuel type: {args.fuel}", file=sys.stderr)
+        sys.exit(1)
+    
+    analyzer = FuelPriceAnalyzer(max_distance_km=args.max_distance)
     
-    analyzer = FuelPriceAnalyzer()
+    if args.stats:
+        fuel = FuelType.parse(args.fuel or FuelType.B7)
+        stats = analyzer.get_price_statistics(fuel.value, args.brand)
+        print(json.dumps({'fuel': fuel.value, 'brand': args.brand, 'pence_per_litre': stats}, indent=2))
+        return
+    
+    if len(args.postcodes) > 1:
+        summaries = analyzer.get_fuel_prices_summaries(args.postcodes, args.fuel or FuelType.B7)
+        if args.brand:
+            summaries = {postcode: {k: v for k, v in summary.items() if k.upper() == args.brand.upper()}
+                         for postcode, summary in summaries.items()}
+        print(json.dumps(summaries, indent=2))
+        return
     
-    if args.json:
-        summary = analyzer.get_diesel_prices_summary(args.postcode)
+    postcode = args.postcodes[0]
+    if args.nearest or args.radius:
+        if args.radius and not args.nearest:
+            stations = analyzer.find_stations_within(postcode, args.radius)
+        else:
+            stations = analyzer.find_nearest_stations(postcode, k=args.nearest,
+                                                      radius_km=args.radius, brand=args.brand)
+        if analyzer.locate_postcode(postcode) is None:
+            print(f"Unknown location for postcode {postcode}", file=sys.stderr)
+        print(json.dumps([asdict(station) for station in stations], indent=2))
+    elif args.json:
+        if args.fuel:
+            summary = analyzer.get_fuel_prices_summary(postcode, args.fuel)
+        else:
+            summary = analyzer.get_diesel_prices_summary(postcode)
         if args.brand:
             summary = {k: v for k, v in summary.items() if k.upper() == args.brand.upper()}
         print(json.dumps(summary, indent=2))
     else:
-        analyzer.compare_all_prices(args.postcode)
+        analyzer.compare_all_prices(postcode)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Fuel Price History - local append-only store of price changes
+Records only the prices that changed on each refresh and answers range and moving-average queries
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from fuel_price_analyzer import FuelPriceAnalyzer, FuelStation, FuelType, PostcodeUtils
+
+DEFAULT_HISTORY_FILE = '/tmp/fuel_price_history.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stations (
+    feed TEXT NOT NULL,
+    site_id TEXT NOT NULL,
+    postcode TEXT,
+    outcode TEXT,
+    area TEXT,
+    latitude REAL,
+    longitude REAL,
+    PRIMARY KEY (feed, site_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS stations_outcode ON stations (outcode);
+CREATE INDEX IF NOT EXISTS stations_area ON stations (area);
+
+-- One row per price change; a NULL price means the fuel stopped being listed
+CREATE TABLE IF NOT EXISTS price_changes (
+    feed TEXT NOT NULL,
+    site_id TEXT NOT NULL,
+    fuel TEXT NOT NULL,
+    ts REAL NOT NULL,
+    price REAL,
+    PRIMARY KEY (feed, site_id, fuel, ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS price_changes_fuel_ts ON price_changes (fuel, ts);
+
+-- Last recorded price per series, so a refresh is diffed without scanning history
+CREATE TABLE IF NOT EXISTS latest_prices (
+    feed TEXT NOT NULL,
+    site_id TEXT NOT NULL,
+    fuel TEXT NOT NULL,
+    price REAL,
+    ts REAL NOT NULL,
+    PRIMARY KEY (feed, site_id, fuel)
+) WITHOUT ROWID;
+"""
+
+def postcode_parts(postcode: str) -> Tuple[str, str, str]:
+    """Normalized postcode, outcode and area"""
+    info = PostcodeUtils.parse_postcode(postcode or '')
+    return info.full_postcode, info.outcode, info.area
+
+def day_range(start: date, end: date) -> List[date]:
+    return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+class PriceHistory:
+    """SQLite-backed history of fuel price changes"""
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv('FUEL_HISTORY_DB', DEFAULT_HISTORY_FILE)
+        # Writers may be refresh threads other than the one that opened the store
+        self.conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+    
+    @classmethod
+    def from_env(cls) -> Optional['PriceHistory']:
+        """Store at FUEL_HISTORY_DB (default /tmp), or None if set to empty to disable recording"""
+        path = os.getenv('FUEL_HISTORY_DB', DEFAULT_HISTORY_FILE)
+        return cls(path) if path else None
+    
+    def close(self):
+        self.conn.close()
+    
+    def record(self, stations: Dict[str, Iterable[FuelStation]], timestamp: Optional[float] = None) -> int:
+        """Append the prices that changed since the last refresh, returning how many
+        
+        Feeds that returned no stations (e.g. failed fetches) are left untouched.
+        """
+        timestamp = timestamp or time.time()
+        with self.conn:
+            latest = {
+                (feed, site_id, fuel): price
+                for feed, site_id, fuel, price in self.conn.execute(
+                    'SELECT feed, site_id, fuel, price FROM latest_prices')
+            }
+            
+            station_rows = []
+            changes = []
+            seen = set()
+            recorded_feeds = set()
+            for feed, feed_stations in stations.items():
+                for station in feed_stations:
+                    if not station.site_id:
+                        continue
+                    recorded_feeds.add(feed)
+                    station_rows.append((feed, station.site_id) + postcode_parts(station.postcode) +
+                                        (station.latitude, station.longitude))
+                    for fuel, price in station.prices.items():
+                        key = (feed, station.site_id, str(fuel))
+                        seen.add(key)
+                        if key not in latest or latest[key] != price:
+                            changes.append(key + (timestamp, price))
+            
+            # Series no longer listed by a feed that did report are closed off
+            for key, price in latest.items():
+                if key not in seen and key[0] in recorded_feeds and price is not None:
+                    changes.append(key + (timestamp, None))
+            
+            self.conn.executemany('INSERT OR REPLACE INTO stations VALUES (?, ?, ?, ?, ?, ?, ?)', station_rows)
+            self.conn.executemany('INSERT OR REPLACE INTO price_changes VALUES (?, ?, ?, ?, ?)', changes)
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO latest_prices VALUES (?, ?, ?, ?, ?)',
+                [(feed, site_id, fuel, price, ts) for feed, site_id, fuel, ts, price in changes]
+            )
+        return len(changes)
+    
+    @staticmethod
+    def _fuel(fuel) -> str:
+        fuel_type = FuelType.parse(fuel)
+        if fuel_type is None:
+            raise ValueError(f"Unknown fuel type: {fuel}")
+        return fuel_type.value
+    
+    def station_history(self, feed: str, site_id: str, fuel=FuelType.B7, start: Optional[float] = None,
+                        end: Optional[float] = None) -> List[Tuple[float, Optional[float]]]:
+        """(timestamp, price) changes for one station's fuel, starting with the price in force at start"""
+        fuel = self._fuel(fuel)
+        start = start if start is not None else 0
+        end = end if end is not None else time.time()
+        key = (feed, site_id, fuel)
+        
+        history = []
+        before = self.conn.execute(
+            'SELECT price FROM price_changes WHERE feed = ? AND site_id = ? AND fuel = ? AND ts < ? '
+            'ORDER BY ts DESC LIMIT 1', key + (start,)).fetchone()
+        if before is not None and start:
+            history.append((start, before[0]))
+        history.extend(self.conn.execute(
+            'SELECT ts, price FROM price_changes WHERE feed = ? AND site_id = ? AND fuel = ? AND ts >= ? AND ts <= ? '
+            'ORDER BY ts', key + (start, end)).fetchall())
+        return history
+    
+    @staticmethod
+    def daily_prices(history: List[Tuple[float, Optional[float]]], days: List[date]) -> List[Optional[float]]:
+        """Price in force at the end of each day, from a time-ordered change list"""
+        values = []
+        index = 0
+        price = None
+        for day in days:
+            day_end = datetime.combine(day + timedelta(days=1), datetime.min.time()).timestamp()
+            while index < len(history) and history[index][0] < day_end:
+                price = history[index][1]
+                index += 1
+            values.append(price)
+        return values
+    
+    @staticmethod
+    def moving_average(values: List[Optional[float]], window: int) -> List[Optional[float]]:
+        """Trailing mean over the last window values, skipping gaps"""
+        averages = []
+        for index in range(len(values)):
+            known = [value for value in values[max(0, index - window + 1):index + 1] if value is not None]
+            averages.append(round(sum(known) / len(known), 2) if known else None)
+        return averages
+    
+    def _days(self, days: int, window: int) -> Tuple[List[date], float]:
+        """Reported days plus the lead-in needed by the window, and the start timestamp"""
+        today = date.today()
+        first = today - timedelta(days=days + window - 2)
+        return day_range(first, today), datetime.combine(first, datetime.min.time()).timestamp()
+    
+    def station_trend(self, feed: str, site_id: str, fuel=FuelType.B7, days: int = 30,
+                      window: int = 7) -> List[Dict]:
+        """Daily price and trailing moving average for one station"""
+        all_days, start = self._days(days, window)
+        daily = self.daily_prices(self.station_history(feed, site_id, fuel, start=start), all_days)
+        averages = self.moving_average(daily, window)
+        return [
+            {'date': day.isoformat(), 'price': price, 'moving_average': average}
+            for day, price, average in list(zip(all_days, daily, averages))[-days:]
+        ]
+    
+    def regional_trend(self, region: str, fuel=FuelType.B7, days: int = 30, window: int = 7) -> List[Dict]:
+        """Daily mean price across an outcode (e.g. BT8) or area (e.g. BT) with its moving average"""
+        fuel = self._fuel(fuel)
+        region = PostcodeUtils.normalize_postcode(region)
+        all_days, start = self._days(days, window)
+        
+        rows = self.conn.execute(
+            'SELECT p.feed, p.site_id, p.ts, p.price FROM price_changes p '
+            'JOIN stations s ON s.feed = p.feed AND s.site_id = p.site_id '
+            'WHERE p.fuel = ? AND (s.outcode = ? OR s.area = ?) AND p.ts >= ? '
+            'UNION ALL '
+            # Price in force at the start of the range (SQLite returns the row holding MAX(ts))
+            'SELECT p.feed, p.site_id, ?, p.price FROM ('
+            '  SELECT feed, site_id, MAX(ts) AS ts, price FROM price_changes '
+            '  WHERE fuel = ? AND ts < ? GROUP BY feed, site_id) p '
+            'JOIN stations s ON s.feed = p.feed AND s.site_id = p.site_id '
+            'WHERE s.outcode = ? OR s.area = ? '
+            'ORDER BY 1, 2, 3',
+            (fuel, region, region, start, start, fuel, start, region, region)
+        ).fetchall()
+        
+        series: Dict[Tuple[str, str], List[Tuple[float, Optional[float]]]] = {}
+        for feed, site_id, ts, price in rows:
+            series.setdefault((feed, site_id), []).append((ts, price))
+        
+        per_station = [self.daily_prices(history, all_days) for history in series.values()]
+        daily = []
+        counts = []
+        for values in zip(*per_station) if per_station else [()] * len(all_days):
+            known = [value for value in values if value is not None]
+            daily.append(round(sum(known) / len(known), 2) if known else None)
+            counts.append(len(known))
+        averages = self.moving_average(daily, window)
+        return [
+            {'date': day.isoformat(), 'average_price': price, 'stations': count, 'moving_average': average}
+            for day, price, count, average in list(zip(all_days, daily, counts, averages))[-days:]
+        ]
+
+def main():
+    """Command line interface"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Record and query fuel price history (prices in pence per litre)")
+    parser.add_argument("--db", help=f"History database (default FUEL_HISTORY_DB or {DEFAULT_HISTORY_FILE})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    commands.add_parser("record", help="Fetch all feeds and record the prices that changed")
+    
+    station = commands.add_parser("station", help="Daily prices and moving average for one station")
+    station.add_argument("feed", help="Feed name, e.g. ASDA")
+    station.add_argument("site_id")
+    station.add_argument("fuel", nargs="?", default="B7")
+    
+    region = commands.add_parser("region", help="Daily mean price and moving average for an outcode or area")
+    region.add_argument("region", help="Outcode (BT8) or area (BT)")
+    region.add_argument("fuel", nargs="?", default="B7")
+    
+    for command in (station, region):
+        command.add_argument("--days", type=int, default=30, help="Days to report (default 30)")
+        command.add_argument("--window", type=int, default=7, help="Moving average window in days (default 7)")
+    
+    args = parser.parse_args()
+    history = PriceHistory(args.db)
+    try:
+        if args.command == "record":
+            stations = FuelPriceAnalyzer().fetch_all_stations(use_cache=False)
+            print(f"Recorded {history.record(stations)} price changes")
+        elif args.command == "station":
+            print(json.dumps(history.station_trend(args.feed, args.site_id, args.fuel, args.days, args.window), indent=2))
+        else:
+            print(json.dumps(history.regional_trend(args.region, args.fuel, args.days, args.window), indent=2))
+    except (ValueError, sqlite3.Error) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        history.close()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -8,60 +8,310 @@ Usage similar to eph_ember.py script
 import sys
 import json
 import os
-from fuel_price_analyzer import FuelPriceAnalyzer, PostcodeUtils
+import time
+
+# Only the modules above are loaded up front so cache hits start fast;
+# the analyzer, locking and subprocess modules are imported when needed.
+
+# Bump when the layout of the answer cache changes
+CACHE_VERSION = 2
+# Bump when the layout of the station dataset changes; 3 stores each feed as columns
+DATASET_VERSION = 3
+
+# Commands usable in a batch: method name and number of arguments
+QUERY_COMMANDS = {
+    'get_diesel': ('get_diesel_price', 2),
+    'get_station': ('get_station_info', 2),
+    'get_cheapest': ('get_cheapest_diesel', 1),
+    'get_comparison': ('get_price_comparison', 1),
+}
+
+def cache_key(postcode: str) -> str:
+    """Normalized postcode, as PostcodeUtils.normalize_postcode without importing the analyzer"""
+    return postcode.upper().replace(' ', '')
+
+class FileLock:
+    """Exclusive flock on a file, usable as a context manager yielding whether it was acquired
+    
+    The lock is shared with other processes, so only one of several
+    concurrent sensor updates does the expensive work.
+    """
+    
+    def __init__(self, path: str, blocking: bool = True, timeout: float = None):
+        self.path = path
+        self.blocking = blocking
+        self.timeout = timeout
+        self.fd = None
+    
+    def __enter__(self) -> bool:
+        import fcntl
+        try:
+            self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError as e:
+            print(f"Warning: Could not open lock {self.path}: {e}", file=sys.stderr)
+            return False
+        
+        deadline = time.time() + self.timeout if self.timeout is not None else None
+        while True:
+            try:
+                fcntl.flock(self.fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                if not self.blocking or (deadline is not None and time.time() >= deadline):
+                    return False
+                time.sleep(0.05)
+    
+    def __exit__(self, *exc_info):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
 
 class HAFuelInterface:
     """Home Assistant command line interface for fuel prices"""
     
     def __init__(self):
-        self.analyzer = FuelPriceAnalyzer()
-        # Cache file to avoid repeated API calls
-        self.cache_file = "/tmp/fuel_prices_cache.json"
+        self._analyzer = None
+        # Per-postcode answers, small enough to read on every sensor update
+        self.cache_file = os.getenv('FUEL_CACHE_FILE', "/tmp/fuel_prices_cache.json")
+        # Raw stations from every feed, shared by all postcodes
+        self.dataset_file = os.getenv('FUEL_DATASET_FILE', "/tmp/fuel_prices_stations.json")
         self.cache_duration = 3600  # 1 hour
+        # Older data is still served while a background refresh runs, up to this age
+        self.max_stale = 24 * 3600
+        self.refresh_timeout = 300
+        self._dataset_timestamp = None
+        # Answers already looked up by this process, e.g. during a batch
+        self._answers = {}
     
-    def get_cached_data(self, postcode: str):
-        """Get cached fuel data if still valid"""
+    @property
+    def analyzer(self):
+        """FuelPriceAnalyzer, created on first use so cache hits never import it"""
+        if self._analyzer is None:
+            from fuel_price_analyzer import FuelPriceAnalyzer
+            self._analyzer = FuelPriceAnalyzer()
+        return self._analyzer
+    
+    @staticmethod
+    def read_json(path: str, version: int = CACHE_VERSION):
+        """Load a cache file, None if missing, unreadable or from an older layout"""
         try:
-            if os.path.exists(self.cache_file):
-                with open(self.cache_file, 'r') as f:
-                    cache = json.load(f)
-                
-                # Check if cache is still valid and for the right postcode
-                import time
-                if (cache.get('timestamp', 0) + self.cache_duration > time.time() and
-                    cache.get('postcode', '').upper() == postcode.upper()):
-                    return cache.get('data')
-        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            with open(path, 'r') as f:
+                data = json.load(f)
+            if isinstance(data, dict) and data.get('version') == version:
+                return data
+        except (OSError, ValueError):
             pass
         return None
     
-    def cache_data(self, postcode: str, data: dict):
-        """Cache fuel data to avoid repeated API calls"""
+    @staticmethod
+    def write_json(path: str, data: dict):
+        """Replace a cache file atomically so readers never see a partial write"""
         try:
-            import time
-            cache = {
-                'timestamp': time.time(),
-                'postcode': postcode.upper(),
-                'data': data
-            }
-            with open(self.cache_file, 'w') as f:
-                json.dump(cache, f)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
         except Exception as e:
             # Don't fail if caching fails
             print(f"Warning: Could not cache data: {e}", file=sys.stderr)
     
+    def get_cached_data(self, postcode: str):
+        """Get cached fuel data for a postcode, refreshing in the background once stale"""
+        cache = self.read_json(self.cache_file)
+        if not cache:
+            return None
+        data = cache.get('postcodes', {}).get(cache_key(postcode))
+        age = time.time() - cache.get('timestamp', 0)
+        if data is None or age > self.max_stale:
+            return None
+        if age > self.cache_duration:
+            self.start_background_refresh()
+        return data
+    
+    def cache_data(self, postcode: str, data: dict, timestamp: float):
+        """Cache a postcode's answer alongside others derived from the same dataset"""
+        # Serialize read-modify-write so concurrent sensors don't drop each other's answers
+        with FileLock(self.cache_file + '.lock', timeout=5):
+            cache = self.read_json(self.cache_file)
+            # Answers from an older dataset must not replace those another process derived from a newer one
+            if cache and cache.get('timestamp', 0) > timestamp:
+                return
+            if not cache or cache.get('timestamp') != timestamp:
+                cache = {'version': CACHE_VERSION, 'timestamp': timestamp, 'postcodes': {}}
+            cache['postcodes'][cache_key(postcode)] = data
+            self.write_json(self.cache_file, cache)
+    
+    @staticmethod
+    def dataset_age(dataset) -> float:
+        """Seconds since a dataset was fetched, infinite if there is none"""
+        return time.time() - dataset.get('timestamp', 0) if dataset else float('inf')
+    
+    def load_dataset(self) -> float:
+        """Load station data into the analyzer, returning the dataset timestamp"""
+        if self._dataset_timestamp is not None:
+            return self._dataset_timestamp
+        
+        dataset = self.read_json(self.dataset_file, DATASET_VERSION)
+        if self.dataset_age(dataset) > self.max_stale:
+            # Single flight: whoever holds the lock fetches, everyone else waits for its result
+            with FileLock(self.dataset_file + '.lock', timeout=self.refresh_timeout):
+                dataset = self.read_json(self.dataset_file, DATASET_VERSION)
+                if self.dataset_age(dataset) > self.max_stale:
+                    return self.refresh_cache()
+        elif self.dataset_age(dataset) > self.cache_duration:
+            self.start_background_refresh()
+        
+        from fuel_price_analyzer import StationStore
+        self.analyzer.set_store(StationStore.from_feed_columns(dataset.get('feeds', {})))
+        self._dataset_timestamp = dataset['timestamp']
+        return self._dataset_timestamp
+    
+    def refresh_cache(self) -> float:
+        """Fetch every feed, store the dataset and re-derive answers for known postcodes"""
+        from fuel_price_analyzer import StationStore
+        known = (self.read_json(self.cache_file) or {}).get('postcodes', {})
+        previous = self.read_json(self.dataset_file, DATASET_VERSION) or {}
+        previous_feeds = previous.get('feeds', {})
+        fetched = dict(self.analyzer.iter_fetch_stations())
+        if known and previous_feeds:
+            # Load the previous snapshot so the refresh can be diffed against it
+            self.analyzer.set_store(StationStore.from_feed_columns(previous_feeds))
+        
+        # Stations stay in columns throughout; no per-station objects or dicts are built
+        store = StationStore()
+        records = {}
+        for api in self.analyzer.apis:
+            feed_store = fetched.get(api.name)
+            if feed_store is not None:
+                records[api.name] = feed_store.feed_columns(api.name)
+            else:
+                # Keep the last good copy of a feed that failed this time
+                records[api.name] = previous_feeds.get(api.name, {})
+            store.add_columns(api.name, records[api.name])
+        succeeded = [name for name, feed_store in fetched.items() if feed_store is not None]
+        self.analyzer.set_store(store)
+        
+        if not succeeded:
+            print("Warning: No fuel feeds could be fetched", file=sys.stderr)
+            self._dataset_timestamp = previous.get('timestamp', time.time())
+            return self._dataset_timestamp
+        
+        timestamp = time.time()
+        self._dataset_timestamp = timestamp
+        self.write_json(self.dataset_file, {'version': DATASET_VERSION, 'timestamp': timestamp, 'feeds': records})
+        
+        # Stations are materialized one at a time as the history store reads them
+        self.record_history({name: store.feed_stations(name) for name in succeeded})
+        
+        # Sensors for postcodes already asked about stay warm after a refresh
+        changes = self.analyzer.last_changes
+        postcodes = {}
+        for key, summary in known.items():
+            # Without stations moving, an answer only changes if one of its stations was repriced
+            if previous_feeds and not changes.layout_changed and not any(
+                    (feed, data.get('station_id')) in changes.prices for feed, data in summary.items()):
+                postcodes[key] = summary
+            else:
+                postcodes[key] = self.analyzer.get_diesel_prices_summary(key)
+        with FileLock(self.cache_file + '.lock', timeout=5):
+            self.write_json(self.cache_file, {'version': CACHE_VERSION, 'timestamp': timestamp, 'postcodes': postcodes})
+        return timestamp
+    
+    def record_history(self, stations: dict):
+        """Append this refresh's price changes to the history store (FUEL_HISTORY_DB, empty to disable)"""
+        try:
+            from fuel_price_history import PriceHistory
+            history = PriceHistory.from_env()
+            if history is not None:
+                try:
+                    history.record(stations)
+                finally:
+                    history.close()
+        except Exception as e:
+            # History is optional, the cache refresh has already succeeded
+            print(f"Warning: Could not record price history: {e}", file=sys.stderr)
+    
+    def refresh_if_stale(self) -> bool:
+        """Refresh unless another process is doing so or has just done so"""
+        with FileLock(self.dataset_file + '.lock', timeout=self.refresh_timeout) as acquired:
+            dataset = self.read_json(self.dataset_file, DATASET_VERSION) if acquired else None
+            if not acquired or self.dataset_age(dataset) <= self.cache_duration:
+                return False
+            self.refresh_cache()
+            return True
+    
+    def start_background_refresh(self):
+        """Refresh the cache in a detached process so this call can answer from stale data"""
+        lock_path = self.dataset_file + '.lock'
+        # The lock file's mtime records the last attempt, so failing feeds aren't retried on every call
+        try:
+            if time.time() - os.path.getmtime(lock_path) < self.refresh_timeout:
+                return
+        except OSError:
+            pass
+        with FileLock(lock_path, blocking=False) as acquired:
+            if not acquired:
+                return  # Another refresh is already running
+            try:
+                os.utime(lock_path)
+            except OSError:
+                pass
+        import subprocess
+        try:
+            subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), 'refresh', '--if-stale'],
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                start_new_session=True
+            )
+        except OSError as e:
+            print(f"Warning: Could not start background refresh: {e}", file=sys.stderr)
+    
     def get_fuel_data(self, postcode: str):
         """Get fuel data for postcode, using cache if available"""
+        key = cache_key(postcode)
+        if key in self._answers:
+            return self._answers[key]
+        
         # Try cache first
         cached = self.get_cached_data(postcode)
         if cached:
+            self._answers[key] = cached
             return cached
         
-        # Fetch fresh data
+        # Derive from the shared station dataset, fetching it only if missing
+        timestamp = self.load_dataset()
         data = self.analyzer.get_diesel_prices_summary(postcode)
-        self.cache_data(postcode, data)
+        self.cache_data(postcode, data, timestamp)
+        self._answers[key] = data
         return data
     
+    def run_batch(self, queries: dict) -> dict:
+        """Answer several queries at once, keyed like the input
+        
+        Each query is a list such as ["get_diesel", "ASDA", "BT8"]. JSON
+        answers are embedded as objects and numeric answers as numbers.
+        """
+        results = {}
+        for key, query in queries.items():
+            if not query or not isinstance(query, list):
+                results[key] = {'error': 'invalid_query'}
+                continue
+            command, args = str(query[0]).lower(), [str(arg) for arg in query[1:]]
+            if command not in QUERY_COMMANDS:
+                results[key] = {'error': 'unknown_command'}
+                continue
+            method, arg_count = QUERY_COMMANDS[command]
+            if len(args) != arg_count:
+                results[key] = {'error': 'bad_arguments'}
+                continue
+            
+            answer = getattr(self, method)(*args)
+            try:
+                results[key] = json.loads(answer)
+            except ValueError:
+                results[key] = answer
+        return results
+    
     def get_diesel_price(self, brand: str, postcode: str) -> str:
         """Get diesel price for specific brand near postcode"""
         try:
@@ -151,6 +401,20 @@ class HAFuelInterface:
             print(f"Error getting price comparison: {e}", file=sys.stderr)
             return json.dumps({'error': 'api_error'})
 
+def parse_batch_queries(args: list, stdin) -> dict:
+    """Batch queries from colon-separated arguments, or a JSON list or object on stdin"""
+    if args:
+        return {arg: arg.split(':') for arg in args}
+    
+    queries = json.load(stdin)
+    if isinstance(queries, list):
+        queries = {(query if isinstance(query, str) else ':'.join(map(str, query))): query
+                   for query in queries}
+    if not isinstance(queries, dict):
+        raise ValueError("batch input must be a JSON list or object")
+    return {key: query.split(':') if isinstance(query, str) else query
+            for key, query in queries.items()}
+
 def usage():
     """Print usage information"""
     print("""
@@ -161,14 +425,23 @@ Commands:
   get_station <brand> <postcode>   - Get station info for brand near postcode
   get_cheapest <postcode>          - Get cheapest diesel price near postcode
   get_comparison <postcode>        - Get price comparison JSON
+  batch [query ...]                - Answer several queries as one JSON object;
+                                     queries are command:arg:arg, or a JSON list
+                                     or {"name": [command, args...]} on stdin
+  refresh [--if-stale]             - Refetch all feeds into the cache
   test_api                         - Test API connectivity
 
-Brands: ASDA, Sainsburys, Tesco
+Brands: ASDA, Sainsburys, Tesco, Morrisons, BP, Esso, JET, MFG, Rontec, SGN, Moto, Ascona, KRL
+
+Cache files: FUEL_CACHE_FILE (default /tmp/fuel_prices_cache.json),
+             FUEL_DATASET_FILE (default /tmp/fuel_prices_stations.json)
 
 Examples:
   ha_fuel_prices.py get_diesel ASDA BT8
   ha_fuel_prices.py get_cheapest "BT8 8FD"
   ha_fuel_prices.py get_comparison BT8
+  ha_fuel_prices.py batch get_diesel:ASDA:BT8 get_diesel:Tesco:BT8 get_cheapest:BT8
+  echo '{"asda": ["get_diesel", "ASDA", "BT8 8FD"]}' | ha_fuel_prices.py batch
 """)
 
 def main():
@@ -215,6 +488,28 @@ def main():
             result = interface.get_price_comparison(postcode)
             print(result)
         
+        elif command == "batch":
+            try:
+                queries = parse_batch_queries(sys.argv[2:], sys.stdin)
+            except ValueError as e:
+                print(f"Invalid batch input: {e}", file=sys.stderr)
+                sys.exit(1)
+            # Keep fetch progress messages out of the JSON document
+            from contextlib import redirect_stdout
+            with redirect_stdout(sys.stderr):
+                results = interface.run_batch(queries)
+            print(json.dumps(results))
+        
+        elif command == "refresh":
+            if sys.argv[2:] == ["--if-stale"]:
+                if not interface.refresh_if_stale():
+                    print("Cache is fresh or being refreshed")
+                    return
+            else:
+                with FileLock(interface.dataset_file + '.lock', timeout=interface.refresh_timeout):
+                    interface.refresh_cache()
+            print(f"Cached {len(interface.analyzer.store)} stations")
+        
         elif command == "test_api":
             # Test with a known postcode
             test_postcode = "BT8"
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Test the EPH push bridge against a local broker stand-in, without EPH or a real MQTT broker
+"""
+
+import base64
+import copy
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+# Keep the cache, zone mapping and breaker state away from a real installation
+WORKDIR = tempfile.mkdtemp(prefix='eph_push_test_')
+os.environ['EPH_ZONE_MAPPING_FILE'] = os.path.join(WORKDIR, 'zones.json')
+os.environ['EPH_BREAKER_FILE'] = os.path.join(WORKDIR, 'breaker.json')
+os.environ['EPH_RETRY_ATTEMPTS'] = '1'
+
+import eph_helper
+from pyephember2 import pyephember2
+
+def zone_payload(zone_id, name, current, target, boiler):
+    """Zone as returned by homesVT/zoneProgram; temperatures are tenths of a degree"""
+    return {
+        'zoneid': zone_id, 'name': name, 'deviceType': 2, 'mac': f"mac{zone_id}", 'productId': 'prod', 'uid': 'uid',
+        'pointDataList': [
+            {'pointIndex': 4, 'value': 0}, {'pointIndex': 5, 'value': current}, {'pointIndex': 6, 'value': target},
+            {'pointIndex': 7, 'value': 2}, {'pointIndex': 8, 'value': 0}, {'pointIndex': 10, 'value': boiler}
+        ]
+    }
+
+class FakeEmber(pyephember2.EphEmber):
+    """EPH session serving fixed homes; set fail to make every request raise"""
+    
+    ZONES = {'gw1': [zone_payload('z1', 'Living', 205, 210, 2), zone_payload('z2', 'Bedroom', 190, 180, 1)]}
+    fail = False
+    requests = 0
+    
+    def __init__(self, username, password):
+        pass
+    
+    def list_homes(self):
+        FakeEmber.requests += 1
+        if FakeEmber.fail:
+            raise ConnectionError("EPH unreachable")
+        return [{'gatewayid': gateway, 'name': 'Home'} for gateway in self.ZONES]
+    
+    def get_homes(self):
+        homes = self.list_homes()
+        for home in homes:
+            home['zones'] = copy.deepcopy(self.ZONES[home['gatewayid']])
+        return homes
+
+pyephember2.EphEmber = FakeEmber
+
+class StandInClient:
+    """Stands in for a paho client: records what is published and delivers messages to its callbacks"""
+    
+    def __init__(self):
+        self.published = []
+        self.subscriptions = []
+        self.on_connect = None
+        self.on_message = None
+    
+    def publish(self, topic, payload, qos=0, retain=False):
+        self.published.append((topic, payload, retain))
+    
+    def subscribe(self, topic, qos=0):
+        self.subscriptions.append(topic)
+    
+    def loop_start(self):
+        self.on_connect(self, None, {}, 0, None)
+    
+    def loop_stop(self):
+        pass
+    
+    def disconnect(self):
+        pass
+    
+    def deliver(self, topic, payload):
+        self.on_message(self, None, SimpleNamespace(topic=topic, payload=payload))
+    
+    def states(self, topic):
+        return [json.loads(payload) for published, payload, _ in self.published if published == topic]
+
+def point_data(*records):
+    """Encode (index, type, value bytes) records as an upload/pointdata payload"""
+    raw = bytes()
+    for index, kind, value in records:
+        raw += bytes([0, index, kind]) + value
+    return base64.b64encode(raw).decode()
+
+def start_bridge(ttl, resync_interval):
+    """Run a bridge on stand-in clients, returning (bridge, local, cloud, thread)"""
+    FakeEmber.fail = False
+    cache = eph_helper.ZoneCache(ttl={field: ttl for field in eph_helper.ZoneCache.FIELDS},
+                                 cache_file=os.path.join(WORKDIR, f"cache_{time.time()}.json"))
+    helper = eph_helper.EPHHelper('user@example.com', 'password', cache=cache)
+    local, cloud = StandInClient(), StandInClient()
+    bridge = eph_helper.EPHPushBridge(helper, local_client=local)
+    bridge.resync_interval = resync_interval
+    thread = threading.Thread(target=bridge.run, kwargs={'cloud_client': cloud}, daemon=True)
+    thread.start()
+    deadline = time.time() + 5
+    while cloud.on_message is None or not bridge.states:
+        if time.time() > deadline:
+            raise AssertionError("bridge did not start")
+        time.sleep(0.01)
+    return bridge, local, cloud, thread
+
+def test_push_updates_cache_and_home_assistant():
+    """A push reaches the cache and the local broker without any EPH request"""
+    bridge, local, cloud, thread = start_bridge(ttl=60, resync_interval=0)
+    try:
+        assert cloud.subscriptions == ['prod/uid/upload/pointdata'], cloud.subscriptions
+        configs = [topic for topic, _, retain in local.published if topic.endswith('/config') and retain]
+        assert len(configs) == 2 * len(bridge.ENTITIES), configs
+        
+        requests = FakeEmber.requests
+        payload = json.dumps({'data': {'mac': 'macz1', 'pointData': point_data((5, 2, bytes([0, 199])), (10, 1, bytes([1])))}})
+        cloud.deliver('prod/uid/upload/pointdata', payload)
+        state = local.states('eph/z1/state')[-1]
+        assert state['current_temperature'] == 19.9 and state['boiler_on'] is False, state
+        assert bridge.helper.get_temperature('Living') == 19.9
+        assert bridge.helper.is_boiler_on('Living') is False
+        assert FakeEmber.requests == requests, "push answered from EPH"
+        
+        # An unchanged push publishes nothing
+        published = len(local.published)
+        cloud.deliver('prod/uid/upload/pointdata', payload)
+        assert len(local.published) == published
+    finally:
+        bridge.stop()
+        thread.join(5)
+    assert local.published[-1] == ('eph/status', 'offline', True)
+    print("  ✓ pushes update the cache and Home Assistant")
+
+def test_readings_expire_when_stream_stalls():
+    """Without pushes, readings stay fresh only while the timed resync reaches EPH"""
+    bridge, local, cloud, thread = start_bridge(ttl=0.5, resync_interval=0.2)
+    try:
+        time.sleep(1.0)
+        hit, value = bridge.helper.cache.get('z2', 'temperature')
+        assert hit and value == 19.0, (hit, value)
+        
+        FakeEmber.fail = True
+        time.sleep(1.0)
+        hit, _ = bridge.helper.cache.get('z2', 'temperature')
+        assert not hit, "reading outlived its TTL with EPH down and no pushes"
+        stale = bridge.helper.last_known_snapshot('z2')
+        assert stale and stale['stale'] and stale['current_temperature'] == 19.0, stale
+    finally:
+        bridge.stop()
+        thread.join(5)
+    print("  ✓ readings expire and are marked stale when the stream and EPH stall")
+
+def main():
+    print("=== EPH Push Bridge ===")
+    failed = 0
+    for test in (test_push_updates_cache_and_home_assistant, test_readings_expire_when_stream_stalls):
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"  ✗ {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test EPH target writes against a fake EPH session, without EPH or an MQTT broker
+"""
+
+import os
+import sys
+
+# The push test's fake session also keeps the cache, zone mapping and breaker state in a scratch directory
+from test_eph_push import WORKDIR, FakeEmber
+import eph_helper
+
+class WritingEmber(FakeEmber):
+    """Fake session whose zone commands report published as set in published"""
+    
+    published = True
+    writes = []
+    
+    def set_zone_target_temperature(self, zone_id, temperature):
+        WritingEmber.writes.append((zone_id, temperature))
+        return WritingEmber.published
+
+def make_helper():
+    cache = eph_helper.ZoneCache(cache_file=os.path.join(WORKDIR, 'writes_cache.json'))
+    helper = eph_helper.EPHHelper('user@example.com', 'password', cache=cache)
+    helper._eph = WritingEmber('user@example.com', 'password')
+    helper.writes.min_interval = 0
+    return helper
+
+def test_unpublished_write_is_a_failure():
+    """A command the messenger did not publish is reported as failed and not cached, so it can be retried"""
+    helper = make_helper()
+    WritingEmber.writes = []
+    WritingEmber.published = False
+    assert helper.set_target_temperature('Living', 22.0) is False, "unpublished write reported as success"
+    hit, target = helper.cache.get('z1', 'target')
+    assert not (hit and target == 22.0), "unpublished target was cached"
+    assert eph_helper.run_command(helper, 'set_target', ['Living', '22']) != 'success'
+    # Once the backoff passes, the same value is written again rather than skipped as already set
+    helper.writes.next_write = helper.writes.backoff = 0
+    WritingEmber.published = True
+    assert helper.set_target_temperature('Living', 22.0) is True
+    assert helper.cache.get('z1', 'target') == (True, 22.0)
+    assert WritingEmber.writes == [('z1', 22.0)] * 3, WritingEmber.writes
+    print("  ✓ unpublished writes fail and are retried")
+
+def main():
+    print("=== EPH Target Writes ===")
+    failed = 0
+    for test in (test_unpublished_write_is_a_failure,):
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"  ✗ {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,9 @@ import requests
 import json
 import sys
 
+# Shared session so probes to the same host reuse pooled keep-alive connections
+session = requests.Session()
+
 def test_fuel_api(name, url):
     """Test a fuel price API"""
     print(f"\n=== Testing {name} ===")
@@ -26,7 +29,7 @@ def test_fuel_api(name, url):
             'Sec-Fetch-Site': 'same-origin'
         }
         
-        response = requests.get(url, timeout=30, headers=headers, allow_redirects=True)
+        response = session.get(url, timeout=30, headers=headers, allow_redirects=True)
         
         if response.status_code == 200:
             try:
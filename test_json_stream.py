@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test streamed feed parsing against json.loads, with the feed split at every possible chunk boundary
+"""
+
+import json
+import sys
+
+from fuel_price_analyzer import iter_json_array
+
+# Numbers of every shape, nested values and multi-byte text, with keys before and after the stations
+SAMPLE_FEED = json.dumps({
+    'last_updated': '16/10/2026 08:00:00',
+    'count': 3,
+    'price_scale': 12.75,
+    'offset': -1e-3,
+    'stations': [
+        {'site_id': 'gb-1', 'brand': 'ASDA', 'postcode': 'BT8 8FD',
+         'location': {'latitude': 54.5659, 'longitude': -5.9266},
+         'prices': {'B7': 1.5, 'E10': 139.9, 'E5': 1.529e2, 'SDV': -0.0}},
+        {'site_id': 'gb-2', 'brand': 'Café Fuel – Ñorth', 'postcode': 'SW1A 1AA',
+         'location': {'latitude': 51.501, 'longitude': -0.1419},
+         'prices': {'B7': 151, 'E10': None}, 'open': True, 'tags': []},
+        {'site_id': 'gb-3', 'brand': 'Tesco', 'postcode': 'M1 2AB',
+         'location': {'latitude': 5.3e1, 'longitude': -2.23E-1},
+         'prices': {'B7': 15099e-2}, 'open': False},
+    ],
+    'meta': {'source': 'test', 'version': 1.0},
+    'averages': [150.9, -2, 1.5e2, 0],
+}, ensure_ascii=False).encode('utf-8')
+
+def stations(chunks, key='stations'):
+    return list(iter_json_array(chunks, key))
+
+def test_every_split_point():
+    """Two chunks split at each byte offset parse the same as json.loads"""
+    expected = json.loads(SAMPLE_FEED)['stations']
+    for offset in range(len(SAMPLE_FEED) + 1):
+        result = stations([SAMPLE_FEED[:offset], SAMPLE_FEED[offset:]])
+        assert result == expected, f"split at byte {offset}: {SAMPLE_FEED[max(0, offset - 10):offset + 10]!r}"
+        # Bare numbers are array items themselves, not nested in an object
+        result = stations([SAMPLE_FEED[:offset], SAMPLE_FEED[offset:]], 'averages')
+        assert result == json.loads(SAMPLE_FEED)['averages'], f"averages split at byte {offset}"
+    print(f"  ✓ {len(SAMPLE_FEED) + 1} split points match json.loads")
+
+def test_single_byte_chunks():
+    """A feed arriving one byte at a time parses the same as json.loads"""
+    expected = json.loads(SAMPLE_FEED)['stations']
+    result = stations(SAMPLE_FEED[i:i + 1] for i in range(len(SAMPLE_FEED)))
+    assert result == expected, result
+    print("  ✓ 1-byte chunks match json.loads")
+
+def test_malformed_number_fails():
+    """A number followed by garbage still raises instead of waiting for more input"""
+    try:
+        stations([b'{"stations": [1.}', b']}'])
+    except ValueError:
+        print("  ✓ malformed numbers are rejected")
+        return
+    raise AssertionError("malformed number was accepted")
+
+def main():
+    print("=== Streamed JSON Feed Parsing ===")
+    failed = 0
+    for test in (test_every_split_point, test_single_byte_chunks, test_malformed_number_fails):
+        try:
+            test()
+        except (AssertionError, ValueError) as e:
+            failed += 1
+            print(f"  ✗ {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,9 @@ import requests
 import json
 import time
 
+# One session for every probe, so repeat requests to a host share a pooled connection
+session = requests.Session()
+
 def test_working_apis():
     """Test the APIs we know work"""
     working_apis = [
@@ -26,7 +29,7 @@ def test_working_apis():
     for name, url in working_apis:
         print(f"\n🔍 {name}")
         try:
-            response = requests.get(url, headers=headers, timeout=15)
+            response = session.get(url, headers=headers, timeout=15)
             if response.status_code == 200:
                 data = response.json()
                 stations = data.get('stations', [])
@@ -88,7 +91,7 @@ def test_alternative_endpoints():
     for name, url in alternatives:
         print(f"\n🔍 {name}: {url}")
         try:
-            response = requests.get(url, headers=headers, timeout=10)
+            response = session.get(url, headers=headers, timeout=10)
             print(f"  Status: {response.status_code}")
             
             if response.status_code == 200: